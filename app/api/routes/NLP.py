@@ -1,84 +1,77 @@
-import re
-import nltk
-import torch
-import pandas as pd
-import numpy as np
-from tqdm import tqdm
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from transformers import BertTokenizer, BertModel
-from sklearn.metrics.pairwise import cosine_similarity
-from deepmultilingualpunctuation import PunctuationModel
+from nltk.tokenize import word_tokenize
+
+from app.core.config import SIGN_MATCH_THRESHOLD
+from app.core.model_registry import get_models
+from app.core.sign_lookup import TIERS
+from app.core.text_normalizer import get_text_normalizer
 
 # Sentence cleaning function
 def clean_sentence(sentence):
-    sentence = str(sentence).lower()
-    sentence = re.sub(r'[^\w\s]', '', sentence)
-    sentence = re.sub(r'\s+', ' ', sentence).strip()
-    tokens = word_tokenize(sentence)
-    stop_words = set(stopwords.words('english'))
-    keep_words = {
-        'i', 'you', 'he', 'she', 'it', 'we', 'they',
-        'me', 'him', 'her', 'us', 'them', 'my', 'your',
-        'his', 'its', 'our', 'their', 'can', 'could', 'will',
-        'would', 'shall', 'should', 'may', 'might', 'must'
-    }
-    filtered_tokens = [word for word in tokens if word not in stop_words or word in keep_words]
-    lemmatizer = WordNetLemmatizer()
-    lemmatized_tokens = [lemmatizer.lemmatize(word, pos='v') for word in filtered_tokens]
-    return ' '.join(lemmatized_tokens)
-
-def NLP(text):
-    punct_model = PunctuationModel()
-    punctuated = punct_model.restore_punctuation(text)
+    return get_text_normalizer().clean_sentence(sentence)
 
-    # Tokenize into words
-    words = word_tokenize(punctuated)
+def NLP(text, has_punctuation=False):
+    """Sign video IDs for `text`. `has_punctuation=True` when the STT engine
+    already punctuated it, so restoration is skipped."""
+    return translate(text, has_punctuation)[0]
 
-    # Clean each word
-    lemmatizer = WordNetLemmatizer()
-    stop_words = set(stopwords.words('english'))
-    keep_words = {
-        'i', 'you', 'he', 'she', 'it', 'we', 'they',
-        'me', 'him', 'her', 'us', 'them', 'my', 'your',
-        'his', 'its', 'our', 'their', 'can', 'could', 'will',
-        'would', 'shall', 'should', 'may', 'might', 'must'
-    }
-    cleaned_words = []
-    for word in words:
-        word = word.lower()
-        word = re.sub(r'[^\w\s]', '', word)
-        if word and (word not in stop_words or word in keep_words):
-            lemma = lemmatizer.lemmatize(word, pos='v')
-            cleaned_words.append(lemma)
+def translate(text, has_punctuation=False):
+    """NLP(), plus how many words each lookup tier resolved (see app.core.sign_lookup)."""
+    models = get_models()
+    punctuated = models.punctuation.restore(text, has_punctuation)
+    tiers = dict.fromkeys(TIERS, 0)
 
-    # Load BERT and vectors
-    tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-    bert_model = BertModel.from_pretrained('bert-base-uncased')
-    bert_model.eval()
+    # Tokenize into words, lowercased and without punctuation
+    normalizer = get_text_normalizer()
+    words = [w for w in normalizer.strip_tokens(word_tokenize(punctuated)) if w]
 
-    word_df = pd.read_csv("app/SignLanguage_dataset/word_vectors0.csv")
-    word_vectors = word_df.drop(columns=["WORD_NAME"]).values
-    word_names = word_df["WORD_NAME"].tolist()
+    # Multi-word signs first, longest match wins; the other words drop
+    # stopwords and are lemmatized, then tried against the sign names,
+    # synonyms and the precomputed lexicon before the embedding lookup.
+    # Each item is (sign IDs, lemma), IDs None while still unresolved.
+    word_names = models.vocabulary.names
+    items = []
+    for sign, word in models.phrases.segment(words, normalizer.lemma):
+        if sign is not None:
+            items.append(([sign], None))
+            tiers["phrase"] += 1
+            continue
+        if not normalizer.keeps(word):
+            continue
+        lemma = normalizer.lemma(word)
+        sign, tier = models.lookup.find(word, lemma)
+        if sign is not None:
+            items.append(([sign], lemma))
+            tiers[tier] += 1
+            continue
+        known = models.lexicon.find(lemma) if models.lexicon is not None else None
+        if known is not None:
+            ids, tier = _decide(lemma, word_names, *known)
+            items.append((ids, lemma))
+            tiers["lexicon" if tier == "embedding" else tier] += 1
+        else:
+            items.append((None, lemma))
+    cleaned_words = [lemma for ids, lemma in items if ids is None]
 
-    final_ids = []
+    # Cached lemmas skip BERT, the rest get one forward pass per batch
+    embeddings = models.embedding_cache.encode(cleaned_words, models.encoder)
 
-    for word in tqdm(cleaned_words, desc="Vectorizing Words"):
-        inputs = tokenizer(word, return_tensors='pt')
-        with torch.no_grad():
-            output = bert_model(**inputs)
-        word_vec = output.last_hidden_state.mean(dim=1).squeeze().numpy().reshape(1, -1)
+    # Match the remaining words against the normalized sign matrix at once
+    best_indices, best_similarities = models.vocabulary.match(embeddings)
+    matches = iter(zip(best_indices, best_similarities))
 
-        similarities = cosine_similarity(word_vec, word_vectors)
-        best_word_idx = np.argmax(similarities)
-        best_word_similarity = similarities[0][best_word_idx]
+    final_ids = []
 
-        if best_word_similarity >= 0.85:
-            final_ids.append(word_names[best_word_idx])
-        else:
-            letters = [char for char in word if char.isalpha()]
-            final_ids.extend(letters)
+    for ids, word in items:
+        if ids is None:
+            ids, tier = _decide(word, word_names, *next(matches))
+            tiers[tier] += 1
+        final_ids.extend(ids)
 
-    return final_ids
+    return final_ids, tiers
 
+def _decide(word, word_names, best_word_idx, best_word_similarity):
+    """The sign if similar enough, else the word spelled letter by letter."""
+    if best_word_similarity >= SIGN_MATCH_THRESHOLD:
+        return [word_names[best_word_idx]], "embedding"
+    letters = [char for char in word if char.isalpha()]
+    return letters, "spelled"
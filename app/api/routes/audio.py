@@ -1,27 +1,52 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Query, Request, WebSocket, WebSocketDisconnect
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import base64
+import json
+import time
 import uuid
 import os
-import subprocess
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 
-from app.core.watson_client import transcribe_audio_with_watson
+from app.core.jobs import Job, job_queue, RUNNING, DONE, FAILED
+from app.core.media_store import (
+    store_by_hash, stored_path, cached_result, add_reference, record_result, release_reference, transcript_preview
+)
+from app.core.uploads import check_content_length, save_upload
+from app.core.config import (
+    STREAM_AUDIO_EXTRACTION,
+    STREAM_AUDIO_FORMAT,
+    LONG_AUDIO_THRESHOLD,
+    LIVE_MAX_MESSAGE_BYTES,
+    HISTORY_PAGE_SIZE,
+    HISTORY_MAX_PAGE_SIZE,
+    TRANSCRIPT_PREVIEW_CHARS,
+)
+from app.core.ffmpeg import FFmpegError, extract_audio, stream_audio
+from app.core.live_audio import LiveAudio, transcribe_window
+from app.core.long_audio import InOrderMerger, probe_duration, transcribe_long_audio
+from app.core.transcription import get_transcription_backend, run_transcription, transcribe_slots
 from app.db.models.file import MediaFile
 from app.db.database import SessionLocal, get_db
-from app.api.routes.NLP import NLP
+from app.api.routes.NLP import translate
+from app.core.model_registry import registry
+from app.core.result_cache import result_cache, etag_matches
 
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_token_username, user_from_token
 from app.db.models.user import User
-from fastapi.responses import FileResponse, JSONResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 
 router = APIRouter()
 
-FFMPEG_PATH = "C:/Users/sadok/Downloads/ffmpeg-7.1.1-essentials_build/ffmpeg-7.1.1-essentials_build/bin/ffmpeg.exe"
-
 UPLOAD_DIR = "uploads"
 VIDEO_DIR = "videos"  # Directory for video files
+VIDEO_EXTENSIONS = [".mp4", ".mov", ".avi", ".mkv"]
+AUDIO_EXTENSIONS = [".mp3", ".wav", ".ogg"]
+EVENTS_KEEPALIVE = 15  # seconds between keep-alive comments on idle event streams
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(VIDEO_DIR, exist_ok=True)
 
@@ -29,119 +54,412 @@ os.makedirs(VIDEO_DIR, exist_ok=True)
 class VideoIdsResponse(BaseModel):
     video_ids: List[str]
 
-def extract_audio(video_path: str, audio_path: str) -> bool:
+async def _save_media(
+    username: str,
+    filename: str,
+    path: str,
+    transcription_path: str,
+    transcription: str,
+    video_ids: List[str],
+    content_hash: str,
+    db: AsyncSession = None
+) -> int:
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
     try:
-        subprocess.run([
-            FFMPEG_PATH, "-y",  # overwrite output if exists
-            "-i", video_path,
-            "-vn",  # no video
-            "-acodec", "libmp3lame",  # explicitly use mp3 encoder
-            audio_path
-        ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except subprocess.CalledProcessError as e:
-        print("Error:", e.stderr.decode())  # pour voir l'erreur exacte
-        return False
-
-@router.post("/transcribe")
+        # The upload already holds its reference on the shared content, remember its result
+        await record_result(db, content_hash, transcription_path, video_ids)
+        preview, preview_truncated = transcript_preview(transcription)
+        media = MediaFile(
+            username=username,
+            filename=filename,
+            path=path,
+            transcription_path=transcription_path,
+            transcription=transcription,
+            preview=preview,
+            preview_truncated=preview_truncated,
+            transcription_length=len(transcription),
+            video_ids=video_ids,
+            content_hash=content_hash
+        )
+        db.add(media)
+        await db.commit()
+        # New latest video ids and history page for this user
+        await result_cache.invalidate(username)
+        return media.id
+    finally:
+        if own_session:
+            await db.close()
+
+def _remove_files(paths):
+    try:
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+    except Exception as e:
+        # Log the error, the DB rows are deleted either way
+        print(f"Error deleting files: {e}")
+
+async def _release_upload(content_hash: str):
+    """Give back the reference an upload took when no MediaFile ends up using it."""
+    async with SessionLocal() as db:
+        paths = await release_reference(db, content_hash)
+        # Before the commit, while the content row is still locked
+        _remove_files(paths)
+        await db.commit()
+
+async def _transcribe_video_stream(video_path: str) -> str:
+    backend = get_transcription_backend()
+    async with transcribe_slots:
+        return await backend.atranscribe_stream(
+            stream_audio(video_path, STREAM_AUDIO_FORMAT),
+            f"audio/{STREAM_AUDIO_FORMAT}"
+        )
+
+class _PartialSigns:
+    """Runs NLP on each part of a transcript as soon as it is final, so sign
+    videos reach the job's followers while later parts are still transcribed.
+    "transcript" and "signs" events are emitted in transcript order."""
+
+    def __init__(self, job: Job, has_punctuation: bool = False):
+        self.job = job
+        self.has_punctuation = has_punctuation
+        self._tasks = []
+
+    async def add(self, index: int, text: str):
+        self.job.emit("transcript", index=index, text=text)
+        previous = self._tasks[-1] if self._tasks else None
+        self._tasks.append(asyncio.create_task(self._signs(index, text, previous)))
+
+    async def _signs(self, index: int, text: str, previous):
+        video_ids, tiers = await job_queue.run_stage(self.job, "nlp", translate, text, self.has_punctuation)
+        registry.match_stats.add(tiers)
+        if previous is not None:
+            await previous
+        self.job.emit("signs", index=index, video_ids=video_ids)
+        return video_ids
+
+    async def video_ids(self) -> List[str]:
+        parts = await asyncio.gather(*self._tasks)
+        return [video_id for part in parts for video_id in part]
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+async def _process_upload(job: Job, content_hash: str, original_path: str, ext: str) -> dict:
+    try:
+        return await _transcribe_upload(job, content_hash, original_path, ext)
+    except BaseException:
+        # The stored file has no MediaFile, drop it unless another upload uses it
+        await _release_upload(content_hash)
+        raise
+
+async def _transcribe_upload(job: Job, content_hash: str, original_path: str, ext: str) -> dict:
+    chunks = []
+    # Transcripts of engines that punctuate skip punctuation restoration
+    has_punctuation = ext != ".txt" and get_transcription_backend().provides_punctuation
+    parts = _PartialSigns(job, has_punctuation)
+    try:
+        # Plain text files skip extraction and transcription
+        if ext == ".txt":
+            with open(original_path, "r", encoding="utf-8") as f:
+                transcription = f.read()
+            txt_path = original_path
+            if transcription.strip():
+                await parts.add(0, transcription)
+        else:
+            duration = await probe_duration(original_path)
+            is_long = duration is not None and duration > LONG_AUDIO_THRESHOLD
+            if ext in VIDEO_EXTENSIONS and STREAM_AUDIO_EXTRACTION and not is_long:
+                # ffmpeg output goes straight to the transcription request, no mp3 on disk
+                transcription = await job_queue.run_stage(job, "transcribe", _transcribe_video_stream, original_path)
+                if transcription.strip():
+                    await parts.add(0, transcription)
+            else:
+                if ext in VIDEO_EXTENSIONS:
+                    # Extract audio from video
+                    audio_path = os.path.join(UPLOAD_DIR, f"{content_hash}.mp3")
+                    if not await job_queue.run_stage(job, "extract", extract_audio, original_path, audio_path):
+                        raise HTTPException(status_code=500, detail="Failed to extract audio from video")
+                else:
+                    audio_path = original_path
+
+                # Long recordings are split on silences and transcribed in parallel,
+                # each chunk goes to NLP as soon as it and the ones before it are done
+                backend = get_transcription_backend()
+                transcribed = await job_queue.run_stage(
+                    job, "transcribe", transcribe_long_audio, audio_path, backend, duration, parts.add
+                )
+                transcription = transcribed["text"]
+                chunks = transcribed["chunks"]
+
+            if not transcription.strip():
+                raise HTTPException(status_code=422, detail="No speech was recognized in the file")
+
+            # Save transcription
+            txt_path = os.path.join(UPLOAD_DIR, f"{content_hash}.txt")
+            with open(txt_path, "w", encoding="utf-8") as f:
+                f.write(transcription)
+
+        # Video IDs of every part, in order
+        video_ids = await parts.video_ids()
+    except BaseException:
+        parts.cancel()
+        raise
+
+    # Save metadata to DB
+    media_id = await _save_media(
+        job.username, job.filename, original_path, txt_path, transcription, video_ids, content_hash
+    )
+    return {"media_id": media_id, "transcription": transcription, "video_ids": video_ids, "chunks": chunks}
+
+@router.post("/transcribe", status_code=202)
 async def transcribe(
-    file: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Generate a unique ID for this transcription
-    transcription_id = str(uuid.uuid4())
-    
+    # The form is read here rather than declared as a File parameter, so the
+    # size is checked before the multipart parser spools the upload to disk
+    check_content_length(request)
+    form = await request.form()
+    file = form.get("file")
+    if not isinstance(file, StarletteUploadFile):
+        raise HTTPException(status_code=422, detail="No file uploaded")
+
     ext = str(os.path.splitext(file.filename)[1]).lower()
-    unique_id = transcription_id
-    original_path = os.path.join(UPLOAD_DIR, f"{unique_id}{ext}")
+    if ext != ".txt" and ext not in VIDEO_EXTENSIONS and ext not in AUDIO_EXTENSIONS:
+        await form.close()
+        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    # Save uploaded file
-    content = await file.read()
-    with open(original_path, "wb") as f:
-        f.write(content)
+    # Save uploaded file, streamed so memory stays bounded to one chunk,
+    # then move it to its content address (sha256) so identical uploads share storage
+    temp_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}{ext}.part")
+    size, content_hash = await save_upload(file, temp_path)
+    # Reference the content before sharing its file, a concurrent delete of
+    # the same content then keeps it
+    await add_reference(db, content_hash, stored_path(UPLOAD_DIR, content_hash, ext))
+    original_path = store_by_hash(temp_path, UPLOAD_DIR, content_hash, ext)
+    print(f"Saved upload {file.filename}: {size} bytes, sha256 {content_hash}")
 
-    # If it's a plain text file, return content directly
-    if ext == ".txt":
-        text_content = content.decode("utf-8")  # assuming utf-8 encoding
-        
-        # Extract video IDs using NLP
-        video_ids = NLP(text_content)
-        
-        # Save metadata to DB for text files too
-        txt_path = original_path
-        media = MediaFile(
-            username=current_user.username,
-            filename=file.filename,
-            path=original_path,
-            transcription_path=txt_path,
-            video_ids=video_ids
-        )
-        db.add(media)
-        db.commit()
-        
-        # Return response in the format expected by the frontend
-        return  text_content
-
-    # Determine if file is audio or video
-    if ext in [".mp4", ".mov", ".avi", ".mkv"]:
-        # Extract audio from video
-        audio_path = os.path.join(UPLOAD_DIR, f"{unique_id}.mp3")
-        if not extract_audio(original_path, audio_path):
-            raise HTTPException(status_code=500, detail="Failed to extract audio from video")
-    elif ext in [".mp3", ".wav", ".ogg"]:
-        audio_path = original_path
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file type")
+    job = Job(current_user.username, file.filename)
 
-    # Transcribe
-    transcription = transcribe_audio_with_watson(audio_path)
-    
-    # Extract video IDs using NLP
-    video_ids = NLP(transcription)
+    # Already transcribed this exact file: reuse the result, no pipeline run
+    try:
+        content = await cached_result(db, content_hash)
+        if content is not None:
+            with open(content.transcription_path, "r", encoding="utf-8") as f:
+                transcription = f.read()
+            media_id = await _save_media(
+                current_user.username, file.filename, content.path,
+                content.transcription_path, transcription, content.video_ids, content_hash, db
+            )
+            return job_queue.complete(job, {
+                "media_id": media_id,
+                "transcription": transcription,
+                "video_ids": content.video_ids,
+            }).to_dict()
+    except BaseException:
+        await _release_upload(content_hash)
+        raise
 
-    # Save transcription
-    txt_path = os.path.join(UPLOAD_DIR, f"{unique_id}.txt") 
-    with open(txt_path, "w", encoding="utf-8") as f:
-        f.write(transcription)
+    # Extraction, transcription and NLP run in the background, the client polls
+    # the job or follows its events
+    job_queue.submit(job, lambda job: _process_upload(job, content_hash, original_path, ext))
+    return job.to_dict()
 
-    # Save metadata to DB
-    media = MediaFile(
-        username=current_user.username,
-        filename=file.filename,
-        path=original_path,
-        transcription_path=txt_path,
-        video_ids=video_ids
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    job = job_queue.get(job_id, current_user.username)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/api/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    job = job_queue.get(job_id, current_user.username)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail="Job is not finished yet")
+    return job.result
+
+@router.get("/api/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-sent events for a job: "stage", "transcript" and "signs" as each part
+    is ready, then "done" with the result or "error". Reconnecting clients
+    resume after the id sent back in Last-Event-ID.
+    """
+    job = job_queue.get(job_id, current_user.username)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    last_id = request.headers.get("last-event-id", "")
+    start = int(last_id) + 1 if last_id.isdigit() else 0
+
+    async def event_stream():
+        async for index, event in job.follow(start, keepalive=EVENTS_KEEPALIVE):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {index}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    db.add(media)
-    db.commit()
-    db.refresh(media)
 
-    # Return response in the format expected by the frontend
-    return  transcription
 
+def _fail_job(job: Job, error: str):
+    job.error = error
+    job.status = FAILED
+    job.finished_at = time.time()
+    job.emit("error", error=error)
+
+async def _transcribe_live(job: Job, audio: LiveAudio):
+    """Transcribe each window of a live recording as it is cut, then finish the job."""
+    backend = get_transcription_backend()
+    parts = _PartialSigns(job, backend.provides_punctuation)
+    windows = []
+    merger = InOrderMerger(windows, parts.add)
+    try:
+        async for window in audio.windows():
+            window["segments"] = await job_queue.run_stage(
+                job, "transcribe", run_transcription, transcribe_window, backend, window
+            )
+            del window["pcm"]
+            windows.append(window)
+            await merger.window_done()
+        job.result = {"transcription": merger.text, "video_ids": await parts.video_ids()}
+        job.status = DONE
+        job.finished_at = time.time()
+        job.emit("done", result=job.result)
+    except asyncio.CancelledError:
+        parts.cancel()
+        raise
+    except Exception as e:
+        parts.cancel()
+        print(f"Live transcription failed: {e}")
+        _fail_job(job, getattr(e, "detail", None) or str(e))
+
+async def _send_live_events(websocket: WebSocket, job: Job):
+    async for _, event in job.follow():
+        await websocket.send_json(event)
+    await websocket.close()
+
+@router.websocket("/ws/transcribe")
+async def live_transcribe(websocket: WebSocket, token: str = Query(...)):
+    """
+    Live microphone transcription. The client sends its recorder's chunks as
+    binary messages and {"type": "stop"} when done; it gets back the same
+    "transcript", "signs", "done" and "error" messages as /api/jobs/{id}/events,
+    plus "busy" while the server is behind. Browsers cannot set headers on a
+    WebSocket, so the token comes as a query parameter.
+    """
+    async with SessionLocal() as db:
+        try:
+            user = await user_from_token(token, db)
+        except HTTPException:
+            await websocket.close(code=1008)
+            return
+
+    await websocket.accept()
+    job = Job(user.username, "live recording")
+    job.status = RUNNING
+    audio = LiveAudio()
+    await audio.start()
+    worker = asyncio.create_task(_transcribe_live(job, audio))
+    sender = asyncio.create_task(_send_live_events(websocket, job))
+    try:
+        busy = False
+        while not job.finished:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data:
+                if len(data) > LIVE_MAX_MESSAGE_BYTES:
+                    worker.cancel()
+                    _fail_job(job, "Audio message too large")
+                    break
+                # Tell the client once when it gets ahead of transcription
+                if audio.backlogged and not busy:
+                    job.emit("busy")
+                busy = audio.backlogged
+                try:
+                    await audio.feed(data)
+                except FFmpegError:
+                    # The worker reports the decoding error
+                    await audio.finish()
+                    break
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                await audio.finish()
+                break
+        if not job.finished:
+            await worker
+        await sender
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away, or the socket was already closed
+        pass
+    except Exception as e:
+        print(f"Live transcription connection failed: {e}")
+    finally:
+        worker.cancel()
+        sender.cancel()
+        await audio.close()
+
+
+async def _cached_response(request: Request, username: str, name: str, load):
+    """JSON response `name` of `username` from the result cache, calling `load()`
+    on a miss. Answers 304 when the client already has this version."""
+    # Generation read before loading: data changed meanwhile is stored under
+    # the old generation, which is never read again
+    key = await result_cache.key(username, name)
+    cached = await result_cache.get(key)
+    if cached is None:
+        cached = await result_cache.set(key, await load())
+    etag, body = cached
+    # private: per user; no-cache: browsers revalidate with If-None-Match every time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 @router.get("/api/get_video_ids", response_model=list)
 async def get_video_ids(
-    
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get video IDs associated with a transcription.
     """
     
-    try:
-        #print(f"Looking for transcription ID: {transcription_id}")
-        print(f"Current user: {current_user.username}")
-        
+    async def latest_video_ids():
         # Query the database for the media file
-        media_file = db.query(MediaFile)\
-    .filter(
-        MediaFile.username == current_user.username  # Keep this if you need user filtering
-    )\
-    .order_by(MediaFile.created_at.desc())\
-    .first()
+        media_file = await db.scalar(
+            select(MediaFile)
+            .where(MediaFile.username == current_user.username)  # Keep this if you need user filtering
+            .order_by(MediaFile.created_at.desc())
+            .limit(1)
+        )
         
         if not media_file:
             #print(f"No media file found for ID: {transcription_id} and user: {current_user.username}")
@@ -151,6 +469,11 @@ async def get_video_ids(
         
         # Return the video IDs
         return media_file.video_ids
+
+    try:
+        #print(f"Looking for transcription ID: {transcription_id}")
+        print(f"Current user: {current_user.username}")
+        return await _cached_response(request, current_user.username, "video_ids", latest_video_ids)
     
     except Exception as e:
         print(f"Error in get_video_ids: {str(e)}")
@@ -159,88 +482,129 @@ async def get_video_ids(
 
 
 # Add endpoints for history and video retrieval
+def _encode_cursor(media: MediaFile) -> str:
+    key = json.dumps([media.created_at.isoformat(), media.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    """(created_at, id) of the last item of the previous page."""
+    try:
+        created_at, media_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(media_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/api/history")
 async def get_history(
+    request: Request,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Get all media files for the current user
-    media_files = db.query(MediaFile).filter(
-        MediaFile.username == current_user.username
-    ).order_by(MediaFile.created_at.desc()).all()
-    
-    result = []
-    for media in media_files:
-        # Read transcription from file
-        try:
-            with open(media.transcription_path, "r", encoding="utf-8") as f:
-                transcription = f.read()
-        except:
-            transcription = "Transcription not available"
-            
-        result.append({
-            "id": media.id,
-            "filename": media.filename,
-            "created_at": media.created_at,
-            "transcription": transcription,
-            "video_count": len(media.video_ids) if media.video_ids else 0
-        })
-    
-    return result
+    """
+    One page of the user's media files, newest first. Pass the returned
+    next_cursor to get the following page; it is null on the last one.
+    """
+    # Keyset pagination on (created_at, id): every page is one index range
+    # scan, however deep into the history it is
+    query = (
+        select(MediaFile)
+        .where(MediaFile.username == current_user.username)
+        .order_by(MediaFile.created_at.desc(), MediaFile.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(MediaFile.created_at, MediaFile.id) < _decode_cursor(cursor))
+
+    async def load_page():
+        media_files = (await db.scalars(query)).all()
+        page = media_files[:limit]
+
+        items = []
+        for media in page:
+            preview, truncated = media.preview, media.preview_truncated
+            if preview is None:
+                # Rows saved before transcripts were stored: read just the start of the file
+                try:
+                    with open(media.transcription_path, "r", encoding="utf-8") as f:
+                        preview, truncated = transcript_preview(f.read(TRANSCRIPT_PREVIEW_CHARS * 2))
+                        truncated = truncated or f.read(1) != ""
+                except:
+                    preview, truncated = "Transcription not available", False
+
+            items.append({
+                "id": media.id,
+                "filename": media.filename,
+                "created_at": media.created_at,
+                "preview": preview,
+                # Full text from /api/transcriptions/{id}; None (rows previewed
+                # before the flag was stored) offers it to be safe
+                "truncated": truncated is not False,
+                "video_count": len(media.video_ids) if media.video_ids else 0
+            })
+
+        next_cursor = _encode_cursor(page[-1]) if len(media_files) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await _cached_response(request, current_user.username, f"history:{limit}:{cursor or ''}", load_page)
 
 @router.get("/api/transcriptions/{media_id}")
 async def get_transcription(
-    media_id: str,
+    media_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Get the media file
-    media = db.query(MediaFile).filter(
+    # Only the transcript columns, the rest of the row is not needed
+    row = (await db.execute(select(MediaFile.transcription, MediaFile.transcription_path).where(
         MediaFile.id == media_id,
         MediaFile.username == current_user.username
-    ).first()
+    ))).first()
     
-    if not media:
+    if not row:
         raise HTTPException(status_code=404, detail="Transcription not found")
     
+    if row.transcription is not None:
+        return PlainTextResponse(row.transcription)
     # Return the transcription file
-    return FileResponse(media.transcription_path)
+    return FileResponse(row.transcription_path)
 
 @router.delete("/api/history/{media_id}")
 async def delete_history_item(
-    media_id: str,
+    media_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Get the media file
-    media = db.query(MediaFile).filter(
+    media = await db.scalar(select(MediaFile).where(
         MediaFile.id == media_id,
         MediaFile.username == current_user.username
-    ).first()
+    ))
     
     if not media:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    # Delete the files
-    try:
-        if os.path.exists(media.path):
-            os.remove(media.path)
-        if os.path.exists(media.transcription_path):
-            os.remove(media.transcription_path)
-    except Exception as e:
-        # Log the error but continue with DB deletion
-        print(f"Error deleting files: {e}")
-    
-    # Delete from database
-    db.delete(media)
-    db.commit()
+    # Files are shared between identical uploads, only delete them with the last reference
+    if media.content_hash:
+        paths = await release_reference(db, media.content_hash)
+    else:
+        paths = [media.path, media.transcription_path]
+
+    # Delete from database, and the files before the commit releases the
+    # content row: an upload of the same content waits, then stores them again
+    await db.delete(media)
+    await db.flush()
+    _remove_files(paths)
+    await db.commit()
+    await result_cache.invalidate(current_user.username)
     
     return {"message": "Item deleted successfully"}
 
 @router.get("/videos/{video_id}")
 async def get_video(
     video_id: str,
-    current_user: User = Depends(get_current_user)
+    # Fetched for every sign during playback: the token alone is enough, no DB lookup
+    username: str = Depends(get_token_username)
 ):
     """
     Serve a video file by its ID.
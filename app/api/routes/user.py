@@ -1,5 +1,7 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.schemas import user as user_schema
 from app.db.models.user import User
@@ -8,22 +10,23 @@ from app.core.security import hash_password, verify_password, create_access_toke
 router = APIRouter()
 
 @router.post("/api/register", response_model=user_schema.UserOut)
-def register(user: user_schema.UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == user.username).first():
+async def register(user: user_schema.UserCreate, db: AsyncSession = Depends(get_db)):
+    if await db.scalar(select(User).where(User.username == user.username)):
         raise HTTPException(status_code=400, detail="Username already exists")
     
-    hashed = hash_password(user.password)
+    # bcrypt is deliberately slow, keep it off the event loop
+    hashed = await asyncio.to_thread(hash_password, user.password)
     db_user = User(username=user.username, email=user.email, hashed_password=hashed)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     print("4")
     return db_user
 
 @router.post("/api/login")
-def login(user: user_schema.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: user_schema.UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.username == user.username))
+    if not db_user or not await asyncio.to_thread(verify_password, user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"sub": db_user.username})
@@ -0,0 +1,91 @@
+"""Accuracy and throughput of the word encoder engines against fp32.
+
+For a reference word list (the words of the sign names, or --words-file with
+one word per line) every engine encodes the words, then each word is matched
+against the sign vocabulary. A decision agrees with fp32 when both pick the
+same sign, or both fall back to fingerspelling. Exits with status 1 if an
+engine agrees on fewer than --min-agreement of the words.
+
+    python -m app.benchmarks.bench_encoder_engines --engines int8 onnx
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from transformers import BertModel
+
+from app.core.config import BERT_MODEL_NAME, SIGN_MATCH_THRESHOLD
+from app.core.encoder import ENGINES, build_encoder
+from app.core.model_registry import registry
+from app.core.sign_vocabulary import l2_normalize
+
+
+def reference_words(names, words_file=None):
+    if words_file:
+        with open(words_file, encoding="utf-8") as f:
+            return [line.strip().lower() for line in f if line.strip()]
+    return sorted({w.lower() for name in names for w in str(name).split()})
+
+
+def decisions(vocabulary, vectors):
+    """Chosen sign index per word, -1 when it would be fingerspelled."""
+    best, similarity = vocabulary.match(vectors)
+    return np.where(similarity >= SIGN_MATCH_THRESHOLD, best, -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engines", nargs="+", default=["int8", "onnx"], choices=ENGINES)
+    parser.add_argument("--words-file")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per engine, best one kept")
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+
+    models = registry.load(warm_up=False)
+    # The registry keeps only its engine's model, every engine here starts from fp32
+    bert_model = BertModel.from_pretrained(BERT_MODEL_NAME)
+    bert_model.eval()
+    words = reference_words(models.vocabulary.names, args.words_file)
+    print(f"{len(words)} reference words, match threshold {SIGN_MATCH_THRESHOLD}")
+
+    failed = False
+    reference = None
+    for engine in ["fp32"] + [e for e in args.engines if e != "fp32"]:
+        try:
+            encoder = build_encoder(models.tokenizer, bert_model, engine, revision=models.model_revision)
+        except RuntimeError as e:
+            print(f"{engine:5}: skipped ({e})")
+            continue
+        encoder.encode(words[:8])  # warm up
+
+        best_seconds = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            vectors = encoder.encode(words)
+            seconds = time.perf_counter() - start
+            best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+        chosen = decisions(models.vocabulary, vectors)
+
+        line = f"{engine:5}: {len(words) / best_seconds:8.1f} words/s"
+        if reference is None:
+            reference = (vectors, chosen, best_seconds)
+        else:
+            ref_vectors, ref_chosen, ref_seconds = reference
+            cosine = (l2_normalize(vectors) * l2_normalize(ref_vectors)).sum(axis=1)
+            agreement = float((chosen == ref_chosen).mean())
+            line += (
+                f" (x{ref_seconds / best_seconds:.2f}), min cosine to fp32 {cosine.min():.4f}, "
+                f"sign decisions agree {agreement:.2%}"
+            )
+            if agreement < args.min_agreement:
+                line += f"  BELOW {args.min_agreement:.0%}"
+                failed = True
+        print(line)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Recall and latency of the IVF sign index against exact search.
+
+    python -m app.benchmarks.bench_sign_index --vocab 20000 --queries 2000
+    python -m app.benchmarks.bench_sign_index --real   # use the built sign matrix
+
+Queries are vocabulary rows with added noise, so each one has a clear nearest
+sign; recall@1 is the share of queries where IVF returns the exact answer.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.sign_index import ExactIndex, IVFIndex
+from app.core.sign_vocabulary import l2_normalize
+
+
+def timed_search(index, queries):
+    start = time.perf_counter()
+    result = index.search(queries)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--real", action="store_true", help="benchmark the built sign matrix")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.real:
+        from app.core.sign_vocabulary import SignVocabulary
+        matrix = np.asarray(SignVocabulary.load(backend="exact").matrix)
+    else:
+        matrix = l2_normalize(rng.normal(size=(args.vocab, args.dim)))
+
+    picks = rng.integers(len(matrix), size=args.queries)
+    queries = l2_normalize(matrix[picks] + args.noise * rng.normal(size=(args.queries, matrix.shape[1])) / np.sqrt(matrix.shape[1]))
+
+    (exact_best, _), exact_seconds = timed_search(ExactIndex(matrix), queries)
+    print(f"exact         : {exact_seconds / len(queries) * 1e6:8.1f} us/query")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(matrix)
+    print(f"ivf build     : {time.perf_counter() - start:.1f}s, {len(ivf.centroids)} lists")
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = min(nprobe, len(ivf.centroids))
+        (best, _), seconds = timed_search(ivf, queries)
+        recall = float((best == exact_best).mean())
+        print(
+            f"ivf nprobe={nprobe:<3}: {seconds / len(queries) * 1e6:8.1f} us/query, "
+            f"recall@1 {recall:.3f}, x{exact_seconds / seconds:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Per-word vs batched BERT vectorization throughput.
+
+    python -m app.benchmarks.bench_vectorize --words 500 --batch-sizes 8 32 64
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.model_registry import registry
+
+
+def sample_words(names, count):
+    words = [w.lower() for name in names for w in name.split()]
+    reps = count // len(words) + 1
+    return (words * reps)[:count]
+
+
+def timed_encode(encoder, words, batch_size):
+    start = time.perf_counter()
+    vectors = encoder.encode(words, batch_size=batch_size)
+    return vectors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    args = parser.parse_args()
+
+    models = registry.load()
+    words = sample_words(models.vocabulary.names, args.words)
+    encoder = models.encoder
+
+    baseline, seconds = timed_encode(encoder, words, 1)
+    print(f"per-word     : {len(words) / seconds:8.1f} words/s ({seconds:.2f}s)")
+
+    for batch_size in args.batch_sizes:
+        vectors, batched_seconds = timed_encode(encoder, words, batch_size)
+        max_diff = float(np.abs(vectors - baseline).max())
+        print(
+            f"batch={batch_size:<6}: {len(words) / batched_seconds:8.1f} words/s "
+            f"({batched_seconds:.2f}s, x{seconds / batched_seconds:.1f}, max abs diff {max_diff:.2e})"
+        )
+
+
+if __name__ == "__main__":
+    main()
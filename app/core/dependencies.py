@@ -1,18 +1,25 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.db.models.user import User
+from app.core.config import ADMIN_USERNAMES
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
+
+def username_from_token(token: str) -> str:
+    """The subject of a valid, unexpired token; checks the signature only."""
+    credentials_exception = _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username = payload.get("sub")
@@ -20,8 +27,32 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return username
+
+async def user_from_token(token: str, db: AsyncSession) -> User:
+    username = username_from_token(token)
+    user = user_cache.get(username)
+    if user is not None:
+        return user
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    user_cache.put(user)
     return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    return await user_from_token(token, db)
+
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return current_user
+
+def get_token_username(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    Username from the signed token claims, with no database round-trip. For
+    routes that only need an authenticated caller: a deleted user's token
+    keeps working here until it expires.
+    """
+    return username_from_token(token)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """LRU cache of word embeddings keyed by (model revision, lemma).
+
+    The cache can be saved to `<path>.npy` (one row per entry) with the keys in
+    `<path>.json`. Loading memory-maps the matrix, so a restarted worker starts
+    warm without reading every vector up front.
+    """
+
+    def __init__(self, revision: str, max_size: int, path: str = None):
+        self.revision = revision
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # When a list, encode() also appends the (word, vector) pairs it adds,
+        # so NLP worker processes can hand them to the parent
+        self.added = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def encode(self, words, encoder) -> np.ndarray:
+        """Embeddings for `words`, running `encoder` only on uncached ones."""
+        vectors = [None] * len(words)
+        missing = {}
+        with self._lock:
+            for i, word in enumerate(words):
+                key = (self.revision, word)
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing.setdefault(word, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                vectors[i] = vector
+            # Both count word occurrences, a repeated uncached word is one encode but several misses
+            missed = sum(len(v) for v in missing.values())
+            self.hits += len(words) - missed
+            self.misses += missed
+
+        if missing:
+            new_words = list(missing)
+            new_vectors = encoder.encode(new_words)
+            for word, vector in zip(new_words, new_vectors):
+                for i in missing[word]:
+                    vectors[i] = vector
+            self.put_many(new_words, new_vectors)
+            if self.added is not None:
+                self.added.extend(zip(new_words, new_vectors))
+
+        if not vectors:
+            return np.zeros((0, encoder.dim), dtype=np.float32)
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def put_many(self, words, vectors):
+        with self._lock:
+            for word, vector in zip(words, vectors):
+                key = (self.revision, word)
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "revision": self.revision,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            items = [(w, v) for (rev, w), v in self._entries.items() if rev == self.revision]
+        if not items:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        matrix = np.stack([v for _, v in items]).astype(np.float32)
+        # Write next to the target and swap, a running worker may have the old file mapped
+        np.save(f"{path}.tmp.npy", matrix)
+        with open(f"{path}.tmp.json", "w", encoding="utf-8") as f:
+            json.dump({"revision": self.revision, "words": [w for w, _ in items]}, f)
+        os.replace(f"{path}.tmp.npy", f"{path}.npy")
+        os.replace(f"{path}.tmp.json", f"{path}.json")
+
+    def load(self, path: str = None) -> int:
+        path = path or self.path
+        if not path or not os.path.exists(f"{path}.npy") or not os.path.exists(f"{path}.json"):
+            return 0
+        try:
+            with open(f"{path}.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(f"{path}.npy", mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Ignoring embedding cache at {path}: {e}")
+            return 0
+        if meta.get("revision") != self.revision or len(meta["words"]) != len(matrix):
+            return 0
+
+        # Most recently used entries were saved last, keep them when trimming
+        words = meta["words"][-self.max_size:]
+        rows = matrix[len(matrix) - len(words):]
+        self.put_many(words, rows)
+        return len(words)
@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import torch
+
+from app.core.config import EMBED_BATCH_SIZE, ENCODER_ENGINE, ONNX_MODEL_PATH, ONNX_THREADS
+
+ENGINES = ("fp32", "int8", "onnx")
+
+
+class WordEncoder:
+    """Turns single words into BERT embeddings (mean of the last hidden state).
+
+    With batch_size=1 every word gets its own forward pass, like the original
+    loop. Larger batches pad words together and pool only over real tokens, so
+    the embeddings are the same while the forward passes are shared.
+    """
+
+    engine = "fp32"
+
+    def __init__(self, tokenizer, model, batch_size: int = EMBED_BATCH_SIZE):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.batch_size = max(1, batch_size)
+
+    @property
+    def dim(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, words, batch_size: int = None) -> np.ndarray:
+        batch_size = max(1, batch_size or self.batch_size)
+        vectors = np.zeros((len(words), self.dim), dtype=np.float32)
+        if not words:
+            return vectors
+
+        # Words of similar length in the same batch keep padding to a minimum
+        order = sorted(range(len(words)), key=lambda i: len(words[i]))
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            vectors[idx] = self._encode_batch([words[i] for i in idx])
+        return vectors
+
+    def _encode_batch(self, words) -> np.ndarray:
+        inputs = self.tokenizer(words, padding=True, return_tensors='pt')
+        with torch.no_grad():
+            output = self.model(**inputs)
+        hidden = output.last_hidden_state
+        mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return pooled.numpy()
+
+
+def _mean_pool(hidden, attention_mask) -> np.ndarray:
+    mask = attention_mask[..., None].astype(np.float32)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+
+
+class QuantizedWordEncoder(WordEncoder):
+    """WordEncoder on a copy of the model whose Linear layers are dynamically
+    quantized to int8: weights stored as int8, activations quantized per batch.
+    Roughly 2-3x faster on CPU, at the cost of small embedding drift."""
+
+    engine = "int8"
+
+    def __init__(self, tokenizer, model, batch_size: int = EMBED_BATCH_SIZE):
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        quantized.eval()
+        super().__init__(tokenizer, quantized, batch_size)
+
+
+class OnnxWordEncoder(WordEncoder):
+    """WordEncoder running an ONNX export of the model with onnxruntime on CPU.
+
+    The graph is exported to ONNX_MODEL_PATH on first use and re-exported when
+    the model revision changes. Needs the optional `onnxruntime` package.
+    """
+
+    engine = "onnx"
+
+    def __init__(
+        self,
+        tokenizer,
+        model,
+        batch_size: int = EMBED_BATCH_SIZE,
+        revision: str = None,
+        path: str = ONNX_MODEL_PATH,
+        threads: int = ONNX_THREADS,
+    ):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("ENCODER_ENGINE=onnx needs the `onnxruntime` package (pip install onnxruntime)")
+        super().__init__(tokenizer, model, batch_size)
+        self._hidden_size = model.config.hidden_size
+
+        if _export_is_stale(path, revision):
+            export_onnx(tokenizer, model, path, revision)
+        options = onnxruntime.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        # The torch model is only needed for the export
+        self.model = None
+
+    @property
+    def dim(self) -> int:
+        return self._hidden_size
+
+    def _encode_batch(self, words) -> np.ndarray:
+        inputs = self.tokenizer(words, padding=True, return_tensors='np')
+        feed = {name: inputs[name].astype(np.int64) for name in self._input_names}
+        hidden = self.session.run(["last_hidden_state"], feed)[0]
+        return _mean_pool(hidden, inputs['attention_mask']).astype(np.float32)
+
+
+def _export_is_stale(path: str, revision: str) -> bool:
+    if not os.path.exists(path) or not os.path.exists(f"{path}.json"):
+        return True
+    with open(f"{path}.json", encoding="utf-8") as f:
+        return json.load(f).get("revision") != revision
+
+
+def export_onnx(tokenizer, model, path: str = ONNX_MODEL_PATH, revision: str = None):
+    """Export `model` (last hidden state only) with dynamic batch and sequence axes."""
+    inputs = tokenizer(["hello", "sign language"], padding=True, return_tensors='pt')
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(inputs[n] for n in names),
+            tmp_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={n: {0: "batch", 1: "sequence"} for n in names + ["last_hidden_state"]},
+            opset_version=14,
+        )
+    os.replace(tmp_path, path)
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump({"revision": revision}, f)
+    print(f"Exported ONNX encoder to {path}")
+
+
+def build_encoder(tokenizer, model, engine: str = ENCODER_ENGINE, revision: str = None) -> WordEncoder:
+    if engine == "fp32":
+        return WordEncoder(tokenizer, model)
+    if engine == "int8":
+        return QuantizedWordEncoder(tokenizer, model)
+    if engine == "onnx":
+        return OnnxWordEncoder(tokenizer, model, revision=revision)
+    raise ValueError(f"Unknown encoder engine: {engine} (expected one of {', '.join(ENGINES)})")
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+from app.core.config import FFMPEG_PATH, FFMPEG_TIMEOUT, FFMPEG_CONCURRENCY
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Limits concurrent ffmpeg processes across the whole app
+ffmpeg_slots = asyncio.Semaphore(FFMPEG_CONCURRENCY)
+
+
+class FFmpegError(Exception):
+    pass
+
+
+async def run_ffmpeg(*args, timeout: float = FFMPEG_TIMEOUT):
+    """Run ffmpeg to completion, returns (return code, stderr text).
+
+    Raises FFmpegError if it runs past `timeout` seconds.
+    """
+    async with ffmpeg_slots:
+        proc = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            raise FFmpegError(f"ffmpeg timed out after {timeout}s")
+        finally:
+            await _kill(proc)
+    return proc.returncode, stderr.decode(errors="replace")
+
+
+async def _kill(proc):
+    if proc.returncode is None:
+        proc.kill()
+        await proc.wait()
+
+
+async def extract_audio(video_path: str, audio_path: str, timeout: float = FFMPEG_TIMEOUT) -> bool:
+    """Extract the audio track of `video_path` to an mp3 without blocking the event loop."""
+    try:
+        returncode, stderr = await run_ffmpeg(
+            "-y",  # overwrite output if exists
+            "-i", video_path,
+            "-vn",  # no video
+            "-acodec", "libmp3lame",  # explicitly use mp3 encoder
+            audio_path,
+            timeout=timeout,
+        )
+    except FFmpegError:
+        print(f"ffmpeg timed out after {timeout}s on {video_path}")
+        return False
+
+    if returncode != 0:
+        print("Error:", stderr)
+        return False
+    return True
+
+
+async def stream_audio(input_path: str, fmt: str = "flac", timeout: float = FFMPEG_TIMEOUT):
+    """Yield the audio of `input_path` as 16 kHz mono `fmt` ("flac" or "wav")
+    straight from ffmpeg's stdout, without writing an intermediate file.
+
+    Raises FFmpegError if ffmpeg fails or runs past `timeout` seconds.
+    """
+    async with ffmpeg_slots:
+        proc = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH,
+            "-i", input_path,
+            "-vn",
+            "-ac", "1",
+            "-ar", "16000",
+            "-f", fmt,
+            "pipe:1",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # Drain stderr alongside stdout so ffmpeg never blocks on a full pipe
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise FFmpegError(f"ffmpeg timed out after {timeout}s on {input_path}")
+                try:
+                    chunk = await asyncio.wait_for(proc.stdout.read(STREAM_CHUNK_SIZE), remaining)
+                except asyncio.TimeoutError:
+                    raise FFmpegError(f"ffmpeg timed out after {timeout}s on {input_path}")
+                if not chunk:
+                    break
+                yield chunk
+
+            await proc.wait()
+            stderr = await stderr_task
+            if proc.returncode != 0:
+                raise FFmpegError(stderr.decode(errors="replace"))
+        finally:
+            stderr_task.cancel()
+            await _kill(proc)
+
+
+class SyncChunkIterator:
+    """Iterate an async chunk generator from a worker thread.
+
+    Blocking clients (the Watson SDK, requests) accept a plain iterator as a
+    streamed request body; each `next()` pulls one chunk from the generator
+    running on the event loop.
+    """
+
+    def __init__(self, chunks, loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        future = asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop)
+        try:
+            return future.result()
+        except StopAsyncIteration:
+            raise StopIteration
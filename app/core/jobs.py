@@ -0,0 +1,164 @@
+import asyncio
+import contextlib
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.config import (
+    EXTRACT_CONCURRENCY,
+    NLP_CONCURRENCY,
+    NLP_WORKERS,
+    JOB_HISTORY_LIMIT,
+)
+from app.core.nlp_pool import nlp_pool
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, username: str, filename: str):
+        self.id = str(uuid.uuid4())
+        self.username = username
+        self.filename = filename
+        self.status = QUEUED
+        self.stage = None
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.timings = {}
+        # Progress events for streaming clients, see follow()
+        self.events = []
+        self._wakeup = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def emit(self, event_type: str, **data):
+        self.events.append({"type": event_type, **data})
+        # Wake every follower, the next ones wait on a fresh event
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def follow(self, start: int = 0, keepalive: float = None):
+        """Yield (index, event) from `start` on as they are emitted, until the job
+        is finished. Yields (None, None) after `keepalive` seconds without events."""
+        index = start
+        while True:
+            while index < len(self.events):
+                yield index, self.events[index]
+                index += 1
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(asyncio.shield(self._wakeup.wait()), keepalive)
+            except asyncio.TimeoutError:
+                yield None, None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "timings": self.timings,
+        }
+
+
+class JobQueue:
+    """In-process job queue. Each job runs as an asyncio task; its blocking
+    stages are pushed to a thread or the NLP process pool, each stage
+    behind its own semaphore so e.g. NLP never runs more than NLP_CONCURRENCY
+    transcripts at once however many uploads are queued."""
+
+    def __init__(self):
+        self._jobs = OrderedDict()
+        self._tasks = set()
+        # "transcribe" has no stage limit: a job can make several engine calls
+        # (long-audio chunks), each holding one of transcription.transcribe_slots
+        self._limits = {
+            "extract": asyncio.Semaphore(EXTRACT_CONCURRENCY),
+            "nlp": asyncio.Semaphore(NLP_CONCURRENCY),
+        }
+
+    def get(self, job_id: str, username: str):
+        job = self._jobs.get(job_id)
+        if job is None or job.username != username:
+            return None
+        return job
+
+    def submit(self, job: Job, pipeline) -> Job:
+        """Run `pipeline(job)` in the background; it returns the job result."""
+        self._jobs[job.id] = job
+        self._forget_old_jobs()
+        task = asyncio.create_task(self._run(job, pipeline))
+        # Keep a reference, the event loop only holds weak ones
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def complete(self, job: Job, result) -> Job:
+        """Register a job whose result is already known, e.g. a cached transcription."""
+        job.result = result
+        job.status = DONE
+        job.finished_at = time.time()
+        job.emit("done", result=result)
+        self._jobs[job.id] = job
+        self._forget_old_jobs()
+        return job
+
+    async def run_stage(self, job: Job, stage: str, fn, *args):
+        """Run `fn(*args)` for `stage`: awaited if it is a coroutine function,
+        otherwise off the event loop in a thread or the NLP process pool."""
+        async with self._limits.get(stage) or contextlib.nullcontext():
+            job.stage = stage
+            job.emit("stage", stage=stage)
+            start = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    return await fn(*args)
+                # NLP_WORKERS=0 keeps NLP in the default thread pool
+                if stage == "nlp" and NLP_WORKERS > 0:
+                    return await nlp_pool.run(fn, *args)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, fn, *args)
+            finally:
+                # A stage can run several times per job (NLP per transcript part)
+                elapsed = time.perf_counter() - start
+                job.timings[stage] = round(job.timings.get(stage, 0) + elapsed, 3)
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        nlp_pool.shutdown()
+
+    async def _run(self, job: Job, pipeline):
+        job.status = RUNNING
+        try:
+            job.result = await pipeline(job)
+            job.status = DONE
+            job.finished_at = time.time()
+            job.emit("done", result=job.result)
+        except Exception as e:
+            print(f"Job {job.id} failed during {job.stage}: {e}")
+            job.error = getattr(e, "detail", None) or str(e)
+            job.status = FAILED
+            job.finished_at = time.time()
+            job.emit("error", error=job.error)
+
+    def _forget_old_jobs(self):
+        while len(self._jobs) > JOB_HISTORY_LIMIT:
+            oldest = next((j for j in self._jobs.values() if j.finished), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest.id]
+
+
+job_queue = JobQueue()
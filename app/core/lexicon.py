@@ -0,0 +1,134 @@
+"""Offline table of lemma embeddings and their best sign.
+
+The encoder only ever sees single lemmas, so a lemma's embedding and best
+sign never change for a given model and vocabulary. The build command
+encodes a large lemma list once and stores:
+
+- `<path>.npy`: float16 embeddings, one row per lemma
+- `<path>.best.npy`: best sign row (int32) and cosine similarity (float32)
+- `<path>.json`: the lemmas, the encoder revision and the vocabulary fingerprint
+
+At runtime the arrays are memory-mapped and NLP() resolves a known lemma
+with a dict lookup; only lemmas missing from the table reach BERT. If the
+sign vocabulary changed since the build, the best matches are recomputed
+from the stored embeddings on load instead of re-running the encoder.
+
+    python -m app.core.lexicon build [--words words.txt]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.core.config import LEXICON_PATH, LEXICON_WORDS_PATH
+from app.core.sign_index import matrix_fingerprint
+
+BEST_DTYPE = np.dtype([("sign", np.int32), ("similarity", np.float32)])
+BUILD_BATCH = 4096
+
+
+class Lexicon:
+    def __init__(self, words, embeddings, best):
+        self.rows = {word: i for i, word in enumerate(words)}
+        self.embeddings = embeddings
+        self.best = best
+
+    def __len__(self):
+        return len(self.rows)
+
+    def find(self, lemma: str):
+        """(best sign row, similarity) for `lemma`, or None if it is not in the table."""
+        row = self.rows.get(lemma)
+        if row is None:
+            return None
+        best = self.best[row]
+        return int(best["sign"]), float(best["similarity"])
+
+    @classmethod
+    def load(cls, revision: str, vocabulary, path: str = LEXICON_PATH):
+        """The table at `path` if built with encoder `revision`, else None."""
+        files = [f"{path}.npy", f"{path}.best.npy", f"{path}.json"]
+        if not all(os.path.exists(f) for f in files):
+            return None
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("revision") != revision:
+            print(f"Ignoring lexicon at {path}: built for {meta.get('revision')}, encoder is {revision}")
+            return None
+        embeddings = np.load(f"{path}.npy", mmap_mode="r")
+        best = np.load(f"{path}.best.npy", mmap_mode="r")
+
+        if not np.allclose(meta.get("vocabulary"), matrix_fingerprint(vocabulary.matrix)):
+            # Same encoder, new signs: the embeddings still hold, re-rank them
+            print(f"Sign vocabulary changed since the lexicon build, re-matching {len(embeddings)} lemmas")
+            best = match_all(vocabulary, embeddings)
+        return cls(meta["words"], embeddings, best)
+
+
+def match_all(vocabulary, embeddings) -> np.ndarray:
+    best = np.zeros(len(embeddings), dtype=BEST_DTYPE)
+    for start in range(0, len(embeddings), BUILD_BATCH):
+        rows = np.asarray(embeddings[start:start + BUILD_BATCH], dtype=np.float32)
+        signs, similarities = vocabulary.match(rows)
+        best["sign"][start:start + len(rows)] = signs
+        best["similarity"][start:start + len(rows)] = similarities
+    return best
+
+
+def source_words(words_path: str = LEXICON_WORDS_PATH) -> list:
+    if words_path:
+        with open(words_path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    from nltk.corpus import wordnet
+    return list(wordnet.all_lemma_names())
+
+
+def build_lexicon(models, words, normalizer, path: str = LEXICON_PATH) -> int:
+    """Encode the distinct lemmas of `words` with `models` and write the table."""
+    single = [w for w in words if " " not in w and "_" not in w]
+    lemmas = list(dict.fromkeys(
+        normalizer.lemma(w) for w in normalizer.strip_tokens(single) if normalizer.keeps(w)
+    ))
+
+    start = time.perf_counter()
+    embeddings = np.zeros((len(lemmas), models.encoder.dim), dtype=np.float16)
+    best = np.zeros(len(lemmas), dtype=BEST_DTYPE)
+    for i in range(0, len(lemmas), BUILD_BATCH):
+        vectors = models.encoder.encode(lemmas[i:i + BUILD_BATCH])
+        # Match on the full-precision vectors, like NLP() does
+        signs, similarities = models.vocabulary.match(vectors)
+        embeddings[i:i + len(vectors)] = vectors
+        best["sign"][i:i + len(vectors)] = signs
+        best["similarity"][i:i + len(vectors)] = similarities
+        print(f"Encoded {i + len(vectors)}/{len(lemmas)} lemmas")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write next to the target and swap, running workers may have the old files mapped
+    np.save(f"{path}.tmp.npy", embeddings)
+    np.save(f"{path}.best.tmp.npy", best)
+    with open(f"{path}.tmp.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "revision": models.revision,
+            "vocabulary": matrix_fingerprint(models.vocabulary.matrix).tolist(),
+            "words": lemmas,
+        }, f)
+    os.replace(f"{path}.tmp.npy", f"{path}.npy")
+    os.replace(f"{path}.best.tmp.npy", f"{path}.best.npy")
+    os.replace(f"{path}.tmp.json", f"{path}.json")
+    print(f"Built lexicon of {len(lemmas)} lemmas at {path} in {time.perf_counter() - start:.0f}s")
+    return len(lemmas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--words", default=LEXICON_WORDS_PATH, help="word list, one per line (default: WordNet lemmas)")
+    parser.add_argument("--path", default=LEXICON_PATH)
+    args = parser.parse_args()
+
+    from app.core.model_registry import registry
+    from app.core.text_normalizer import get_text_normalizer
+
+    build_lexicon(registry.load(warm_up=False), source_words(args.words), get_text_normalizer(), args.path)
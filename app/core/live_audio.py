@@ -0,0 +1,188 @@
+"""Decoding of a recording that is still being made.
+
+The browser sends its recorder's chunks (webm/ogg or mp3 frames) as they are
+produced; they are piped into one long-running ffmpeg that turns them into
+16 kHz mono PCM. The PCM is cut into windows of about LIVE_WINDOW_SECONDS,
+each ending on the quietest 20 ms of its last second and overlapping the next
+by LIVE_OVERLAP_SECONDS, so they can be transcribed on their own and merged
+like the chunks of a long file (see app.core.long_audio).
+
+Memory per connection stays bounded: at most LIVE_MAX_PENDING_WINDOWS windows
+wait for transcription. When they are all taken the reader stops draining
+ffmpeg, ffmpeg stops reading its stdin, `feed()` blocks, and the WebSocket
+stops being read, which pushes the backpressure back to the client.
+"""
+import asyncio
+import io
+import math
+import os
+import tempfile
+import wave
+
+import numpy as np
+
+from app.core.config import (
+    FFMPEG_PATH,
+    LIVE_WINDOW_SECONDS,
+    LIVE_OVERLAP_SECONDS,
+    LIVE_MAX_PENDING_WINDOWS,
+)
+from app.core.ffmpeg import FFmpegError
+
+SAMPLE_RATE = 16000
+SAMPLE_BYTES = 2  # s16le
+FRAME_SAMPLES = SAMPLE_RATE // 50  # 20 ms
+READ_SIZE = 32 * 1024
+
+
+def quietest_frame(pcm: bytes, first: int, last: int) -> int:
+    """Sample offset of the 20 ms frame with the least energy between samples `first` and `last`."""
+    samples = np.frombuffer(pcm, dtype=np.int16)[first:last].astype(np.float32)
+    frames = len(samples) // FRAME_SAMPLES
+    if frames == 0:
+        return last
+    energy = np.square(samples[:frames * FRAME_SAMPLES]).reshape(frames, FRAME_SAMPLES).sum(axis=1)
+    return first + int(np.argmin(energy)) * FRAME_SAMPLES
+
+
+def to_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_BYTES)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def transcribe_window(backend, window: dict) -> list:
+    """Segments of one live window, with times relative to the window."""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        f.write(to_wav(window["pcm"]))
+    try:
+        return backend.transcribe_segments(f.name)
+    finally:
+        os.remove(f.name)
+
+
+class LiveAudio:
+    """One live recording: `feed()` it encoded chunks, iterate `windows()` for
+    dicts with "index", "start", "end", "own_start", "own_end" (seconds) and
+    "pcm" (16 kHz mono s16le bytes)."""
+
+    def __init__(
+        self,
+        window: float = LIVE_WINDOW_SECONDS,
+        overlap: float = LIVE_OVERLAP_SECONDS,
+        max_pending: int = LIVE_MAX_PENDING_WINDOWS,
+    ):
+        self.window_samples = int(window * SAMPLE_RATE)
+        self.overlap_samples = int(overlap * SAMPLE_RATE)
+        self._pending = asyncio.Queue(maxsize=max_pending)
+        self._proc = None
+        self._reader = None
+        self._stderr = None
+
+    @property
+    def backlogged(self) -> bool:
+        return self._pending.full()
+
+    async def start(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._stderr = asyncio.create_task(self._proc.stderr.read())
+        self._reader = asyncio.create_task(self._read_pcm())
+
+    async def feed(self, data: bytes):
+        """Pass one encoded chunk to ffmpeg, waiting while the pipeline is behind."""
+        try:
+            self._proc.stdin.write(data)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            raise FFmpegError("ffmpeg stopped decoding the live audio")
+
+    async def finish(self):
+        """No more audio: flush what is buffered as the last window."""
+        if not self._proc.stdin.is_closing():
+            self._proc.stdin.close()
+
+    async def windows(self):
+        while True:
+            window = await self._pending.get()
+            if window is None:
+                break
+            yield window
+        # Surface a decoding failure once every window before it was handled
+        await self._reader
+
+    async def close(self):
+        for task in (self._reader, self._stderr):
+            if task is not None:
+                task.cancel()
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.kill()
+            await self._proc.wait()
+
+    async def _read_pcm(self):
+        error = None
+        try:
+            await self._cut_windows()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        # Always end the stream so windows() never waits forever
+        await self._pending.put(None)
+        if error is not None:
+            raise error
+
+    async def _cut_windows(self):
+        buffer = bytearray()
+        offset = 0  # absolute sample index of buffer[0]
+        own_start = 0.0
+        index = 0
+        while True:
+            data = await self._proc.stdout.read(READ_SIZE)
+            if not data:
+                break
+            buffer += data
+            while len(buffer) // SAMPLE_BYTES >= self.window_samples:
+                # End the window on a pause if there is one in its last second
+                cut = quietest_frame(
+                    buffer, max(self.window_samples - SAMPLE_RATE, self.overlap_samples + 1), self.window_samples
+                )
+                start, end = offset / SAMPLE_RATE, (offset + cut) / SAMPLE_RATE
+                own_end = end - self.overlap_samples / SAMPLE_RATE / 2
+                await self._pending.put({
+                    "index": index, "start": start, "end": end,
+                    "own_start": own_start, "own_end": own_end,
+                    "pcm": bytes(buffer[:cut * SAMPLE_BYTES]),
+                })
+                index += 1
+                own_start = own_end
+                keep_from = cut - self.overlap_samples
+                del buffer[:keep_from * SAMPLE_BYTES]
+                offset += keep_from
+
+        await self._proc.wait()
+        if self._proc.returncode != 0:
+            raise FFmpegError((await self._stderr).decode(errors="replace") or "ffmpeg could not decode the live audio")
+
+        # The tail after the last full window, it owns everything up to the end
+        samples = len(buffer) // SAMPLE_BYTES
+        if samples:
+            await self._pending.put({
+                "index": index,
+                "start": offset / SAMPLE_RATE,
+                "end": (offset + samples) / SAMPLE_RATE,
+                "own_start": own_start,
+                "own_end": math.inf,
+                "pcm": bytes(buffer[:samples * SAMPLE_BYTES]),
+            })
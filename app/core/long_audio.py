@@ -0,0 +1,223 @@
+"""Chunked, parallel transcription of long recordings.
+
+Audio longer than LONG_AUDIO_THRESHOLD seconds is cut into windows of about
+LONG_AUDIO_CHUNK seconds whose edges are moved onto silences (found with
+ffmpeg's silencedetect) and which overlap by LONG_AUDIO_OVERLAP seconds.
+Windows are transcribed concurrently, at most LONG_AUDIO_CONCURRENCY at a
+time per file and within the app-wide TRANSCRIBE_CONCURRENCY engine calls,
+then merged on absolute timestamps: each window owns the time range up to the
+middle of its overlaps and only its words inside that range are kept, so the
+overlap is not transcribed twice. Engines without word timings fall
+back to dropping the longest repeated run of words at each seam.
+"""
+import asyncio
+import os
+import re
+import tempfile
+import time
+
+from app.core.config import (
+    LONG_AUDIO_THRESHOLD,
+    LONG_AUDIO_CHUNK,
+    LONG_AUDIO_OVERLAP,
+    LONG_AUDIO_CONCURRENCY,
+)
+from app.core.ffmpeg import FFmpegError, run_ffmpeg
+from app.core.transcription import join_segments, run_transcription
+
+DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+SILENCE_START_RE = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+SILENCE_END_RE = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+MAX_SEAM_WORDS = 12
+
+
+def _parse_duration(stderr: str):
+    match = DURATION_RE.search(stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+async def probe_duration(path: str):
+    """Duration of `path` in seconds, or None if ffmpeg cannot tell."""
+    # Without an output ffmpeg exits with an error, but prints the input info first
+    try:
+        _, stderr = await run_ffmpeg("-hide_banner", "-i", path)
+    except (FileNotFoundError, FFmpegError) as e:
+        # No ffmpeg binary, or it hung: transcribe the file in one call
+        print(f"Could not probe the duration of {path}: {e}")
+        return None
+    return _parse_duration(stderr)
+
+
+async def detect_silences(path: str, noise_db: int = -30, min_silence: float = 0.4) -> list:
+    """(start, end) of every silence in `path`, in seconds."""
+    returncode, stderr = await run_ffmpeg(
+        "-hide_banner", "-i", path, "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"
+    )
+    if returncode != 0:
+        raise FFmpegError(stderr)
+    starts = [max(0.0, float(s)) for s in SILENCE_START_RE.findall(stderr)]
+    ends = [float(e) for e in SILENCE_END_RE.findall(stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_windows(duration: float, silences, chunk: float = LONG_AUDIO_CHUNK, overlap: float = LONG_AUDIO_OVERLAP) -> list:
+    """Split [0, duration] into overlapping windows cut at silences when possible.
+
+    Each window is a dict with its audio range ("start", "end") and the range
+    it owns when merging ("own_start", "own_end").
+    """
+    midpoints = [(s + e) / 2 for s, e in silences]
+    windows = []
+    start = 0.0
+    while True:
+        end = start + chunk
+        if end >= duration:
+            windows.append({"start": start, "end": duration})
+            break
+        # Prefer the latest silence in the last quarter of the window
+        candidates = [m for m in midpoints if end - chunk / 4 <= m <= end]
+        if candidates:
+            end = candidates[-1]
+        windows.append({"start": start, "end": end})
+        start = max(end - overlap, start + overlap)
+
+    for i, window in enumerate(windows):
+        window["index"] = i
+        window["own_start"] = 0.0 if i == 0 else (window["start"] + windows[i - 1]["end"]) / 2
+        window["own_end"] = duration if i == len(windows) - 1 else (window["end"] + windows[i + 1]["start"]) / 2
+    return windows
+
+
+def _seam_dedup(merged, words) -> list:
+    # Drop the longest run of words repeated across the seam
+    for n in range(min(MAX_SEAM_WORDS, len(merged), len(words)), 0, -1):
+        if [w.lower() for w in merged[-n:]] == [w.lower() for w in words[:n]]:
+            return words[n:]
+    return words
+
+
+def _merge_untimed(texts) -> str:
+    merged = []
+    for text in texts:
+        merged.extend(_seam_dedup(merged, text.split()))
+    return " ".join(merged)
+
+
+def _owned_segments(window) -> list:
+    """The window's segments on absolute time, keeping only words in its own range."""
+    segments = []
+    for seg in window["segments"]:
+        words = []
+        for word, start, end in seg["words"]:
+            start, end = start + window["start"], end + window["start"]
+            if window["own_start"] <= start < window["own_end"]:
+                words.append([word, start, end])
+        if words:
+            segments.append({
+                "text": " ".join(w[0] for w in words),
+                "start": words[0][1],
+                "end": words[-1][2],
+                "words": words,
+            })
+    return segments
+
+
+def _is_timed(window) -> bool:
+    return all(seg["words"] for seg in window["segments"])
+
+
+def merge_windows(windows) -> dict:
+    """Merge per-window segments (window["segments"], times relative to the window)."""
+    if not all(_is_timed(w) for w in windows):
+        texts = [join_segments(w["segments"]) for w in windows]
+        return {"text": _merge_untimed(texts), "segments": []}
+
+    segments = [seg for window in windows for seg in _owned_segments(window)]
+    segments.sort(key=lambda s: s["start"])
+    return {"text": join_segments(segments), "segments": segments}
+
+
+class InOrderMerger:
+    """Merges windows as they finish, in window order, handing each window's
+    share of the transcript to `on_text(index, text)` as soon as every window
+    before it is done. `windows` may keep growing, e.g. for live audio."""
+
+    def __init__(self, windows, on_text):
+        self._windows = windows
+        self._on_text = on_text
+        self._next = 0
+        self._words = []
+
+    async def window_done(self):
+        while self._next < len(self._windows) and "segments" in self._windows[self._next]:
+            window = self._windows[self._next]
+            if _is_timed(window):
+                words = [w[0] for seg in _owned_segments(window) for w in seg["words"]]
+            else:
+                words = _seam_dedup(self._words, join_segments(window["segments"]).split())
+            self._words.extend(words)
+            self._next += 1
+            if words:
+                await self._on_text(window["index"], " ".join(words))
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._words)
+
+
+async def _cut(path: str, window: dict, out_path: str):
+    returncode, stderr = await run_ffmpeg(
+        "-y", "-ss", f"{window['start']:.3f}", "-t", f"{window['end'] - window['start']:.3f}",
+        "-i", path, "-vn", "-ac", "1", "-ar", "16000", out_path,
+    )
+    if returncode != 0:
+        raise FFmpegError(stderr)
+
+
+async def transcribe_long_audio(path: str, backend, duration: float = None, on_text=None) -> dict:
+    """Transcribe `path`, chunked if longer than LONG_AUDIO_THRESHOLD.
+
+    Returns {"text", "segments", "chunks"}; "chunks" holds each window's range
+    and how long its cut and transcription took. If given, `await on_text(index,
+    text)` is called with each part of the transcript, in order, as it becomes final.
+    """
+    if duration is None:
+        duration = await probe_duration(path)
+    if duration is None or duration <= LONG_AUDIO_THRESHOLD:
+        segments = await run_transcription(backend.transcribe_segments, path)
+        text = join_segments(segments)
+        if on_text is not None and text:
+            await on_text(0, text)
+        return {"text": text, "segments": segments, "chunks": []}
+
+    windows = plan_windows(duration, await detect_silences(path))
+    limit = asyncio.Semaphore(LONG_AUDIO_CONCURRENCY)
+    merger = InOrderMerger(windows, on_text) if on_text is not None else None
+
+    with tempfile.TemporaryDirectory(prefix="chunks-") as tmp:
+        async def run(window):
+            async with limit:
+                chunk_path = os.path.join(tmp, f"{window['index']}.flac")
+                start = time.perf_counter()
+                await _cut(path, window, chunk_path)
+                cut_seconds = time.perf_counter() - start
+                window["segments"] = await run_transcription(backend.transcribe_segments, chunk_path)
+                window["timing"] = {
+                    "cut": round(cut_seconds, 3),
+                    "transcribe": round(time.perf_counter() - start - cut_seconds, 3),
+                }
+            if merger is not None:
+                await merger.window_done()
+
+        await asyncio.gather(*(run(w) for w in windows))
+
+    merged = merge_windows(windows)
+    merged["chunks"] = [
+        {"index": w["index"], "start": round(w["start"], 2), "end": round(w["end"], 2), **w["timing"]}
+        for w in windows
+    ]
+    print(f"Transcribed {duration:.0f}s of audio in {len(windows)} chunks")
+    return merged
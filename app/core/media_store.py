@@ -0,0 +1,107 @@
+"""Content-addressed storage for uploads.
+
+Files are stored once as `<UPLOAD_DIR>/<sha256><ext>`. A MediaContent row per
+hash keeps the transcription result and how many MediaFile rows (or running
+jobs) use it, so a re-upload reuses both the file and the result, and files
+are only deleted when the last reference to them is dropped.
+"""
+import os
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import TRANSCRIPT_PREVIEW_CHARS
+from app.db.models.file import MediaContent
+
+
+def stored_path(upload_dir: str, content_hash: str, ext: str) -> str:
+    return os.path.join(upload_dir, f"{content_hash}{ext}")
+
+
+def store_by_hash(temp_path: str, upload_dir: str, content_hash: str, ext: str) -> str:
+    """Move a freshly uploaded file to its content address, dropping it if already stored."""
+    path = stored_path(upload_dir, content_hash, ext)
+    if os.path.exists(path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, path)
+    return path
+
+
+def transcript_preview(text: str, limit: int = TRANSCRIPT_PREVIEW_CHARS):
+    """(preview, truncated): the start of `text` with its whitespace collapsed,
+    cut at a word boundary when it is longer than `limit`."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text, False
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut) + "...", True
+
+
+async def cached_result(db, content_hash: str):
+    """The MediaContent for `content_hash` if it already has a transcription."""
+    content = await db.get(MediaContent, content_hash)
+    if content is None or content.transcription_path is None or content.video_ids is None:
+        return None
+    return content
+
+
+async def add_reference(db, content_hash: str, path: str):
+    """Count one more user of `content_hash`, stored at `path` if it is new. Commits.
+
+    Taken as soon as an upload is stored, before its job runs, so deleting
+    another MediaFile of the same content never removes files still in use.
+    The count changes in the database, concurrent uploads and deletes can't
+    overwrite each other's update.
+    """
+    for attempt in range(2):
+        result = await db.execute(
+            update(MediaContent)
+            .where(MediaContent.content_hash == content_hash)
+            .values(ref_count=MediaContent.ref_count + 1)
+        )
+        if result.rowcount == 0:
+            db.add(MediaContent(content_hash=content_hash, path=path, ref_count=1))
+        try:
+            await db.commit()
+            return
+        except IntegrityError:
+            # Same content stored by a concurrent upload, count on its row instead
+            await db.rollback()
+            if attempt:
+                raise
+
+
+async def record_result(db, content_hash: str, transcription_path: str, video_ids):
+    """Remember the transcription of `content_hash` for re-uploads (caller commits)."""
+    await db.execute(
+        update(MediaContent)
+        .where(MediaContent.content_hash == content_hash)
+        .values(transcription_path=transcription_path, video_ids=video_ids)
+    )
+
+
+async def release_reference(db, content_hash: str):
+    """Drop one reference; returns the files to delete once none are left.
+
+    The row stays locked until the caller commits: remove the returned files
+    before committing, so an upload of the same content waits and then stores
+    its file afresh instead of sharing one about to be deleted.
+    """
+    row = (await db.execute(
+        update(MediaContent)
+        .where(MediaContent.content_hash == content_hash)
+        .values(ref_count=MediaContent.ref_count - 1)
+        .returning(MediaContent.ref_count, MediaContent.path, MediaContent.transcription_path)
+    )).first()
+    if row is None or row.ref_count > 0:
+        return []
+
+    await db.execute(
+        delete(MediaContent).where(MediaContent.content_hash == content_hash, MediaContent.ref_count <= 0)
+    )
+    root, ext = os.path.splitext(row.path)
+    # The .txt and .mp3 may exist without being recorded, when the last job failed
+    paths = [row.path, row.transcription_path, f"{root}.txt", f"{root}.mp3"]
+    return [p for p in dict.fromkeys(paths) if p]
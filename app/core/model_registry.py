@@ -0,0 +1,152 @@
+import threading
+import time
+
+from transformers import BertTokenizer, BertModel
+from deepmultilingualpunctuation import PunctuationModel
+
+from app.core.config import BERT_MODEL_NAME, EMBED_CACHE_SIZE, EMBED_CACHE_PATH
+from app.core.embedding_cache import EmbeddingCache
+from app.core.encoder import build_encoder
+from app.core.lexicon import Lexicon
+from app.core.phrase_index import PhraseIndex
+from app.core.punctuation import PunctuationRestorer
+from app.core.sign_lookup import ExactLookup, MatchStats
+from app.core.sign_vocabulary import SignVocabulary
+from app.core.text_normalizer import get_text_normalizer
+
+WARM_UP_TEXT = "hello i want to go home"
+
+
+def _module_bytes(module) -> int:
+    if module is None:
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class LoadedModels:
+    """One consistent set of models. Requests keep a reference to the set they
+    started with, so a reload never mixes an old tokenizer with a new model."""
+
+    def __init__(self):
+        self.punct_model = PunctuationModel()
+        self.punctuation = PunctuationRestorer(self.punct_model)
+
+        self.tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
+        bert_model = BertModel.from_pretrained(BERT_MODEL_NAME)
+        bert_model.eval()
+
+        commit_hash = getattr(bert_model.config, "_commit_hash", None) or "local"
+        self.model_revision = f"{BERT_MODEL_NAME}@{commit_hash}"
+        self.encoder = build_encoder(self.tokenizer, bert_model, revision=self.model_revision)
+        # Only the model the engine runs stays referenced, so the fp32 weights are
+        # freed under int8 (quantized copy) and onnx (None, onnxruntime holds the graph)
+        self.bert_model = self.encoder.model
+        # Engines give slightly different vectors, cached ones must not be mixed
+        self.revision = f"{self.model_revision}/{self.encoder.engine}"
+        self.embedding_cache = EmbeddingCache(self.revision, EMBED_CACHE_SIZE, EMBED_CACHE_PATH)
+        self.embedding_cache.load()
+
+        self.vocabulary = SignVocabulary.load()
+        normalizer = get_text_normalizer()
+        self.phrases = PhraseIndex.from_names(self.vocabulary.names, normalizer)
+        self.lookup = ExactLookup.build(self.vocabulary.names, normalizer)
+        # Optional, see app.core.lexicon
+        self.lexicon = Lexicon.load(self.revision, self.vocabulary)
+
+        self.loaded_at = time.time()
+
+    def warm_up(self):
+        # First calls pay for lazy allocations inside torch / the HF pipeline
+        self.punctuation.restore(WARM_UP_TEXT)
+        self.encoder.encode(WARM_UP_TEXT.split())
+
+    def memory_usage(self) -> dict:
+        punct_pipe = getattr(self.punct_model, "pipe", None)
+        usage = {
+            "bert_model": _module_bytes(self.bert_model),
+            "punctuation_model": _module_bytes(getattr(punct_pipe, "model", None)),
+            "sign_matrix": int(self.vocabulary.matrix.nbytes),
+            "embedding_cache": len(self.embedding_cache) * self.encoder.dim * 4,
+            "lexicon": int(self.lexicon.embeddings.nbytes + self.lexicon.best.nbytes) if self.lexicon is not None else 0,
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Each reload holds a second full set of models, never build two at once
+        self._reload_lock = threading.Lock()
+        self._models = None
+        self.load_seconds = None
+        # Kept across reloads, fed with the counts every NLP call returns
+        self.match_stats = MatchStats()
+
+    @property
+    def loaded(self) -> bool:
+        return self._models is not None
+
+    def load(self, warm_up: bool = True) -> LoadedModels:
+        with self._lock:
+            if self._models is None:
+                self._models = self._build(warm_up)
+            return self._models
+
+    def reload(self, warm_up: bool = True) -> LoadedModels:
+        with self._reload_lock:
+            # Persist what the current set learned so the new one starts warm
+            self.save_cache()
+            # Build the new set first so requests keep being served by the old one
+            models = self._build(warm_up)
+            with self._lock:
+                self._models = models
+            return models
+
+    def get(self) -> LoadedModels:
+        models = self._models
+        if models is None:
+            models = self.load()
+        return models
+
+    def save_cache(self):
+        if self._models is not None:
+            self._models.embedding_cache.save()
+
+    def status(self) -> dict:
+        models = self._models
+        if models is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "model_revision": models.revision,
+            "encoder_engine": models.encoder.engine,
+            "loaded_at": models.loaded_at,
+            "load_seconds": self.load_seconds,
+            "vocabulary_size": len(models.vocabulary),
+            "phrase_count": len(models.phrases),
+            "exact_lookup_size": len(models.lookup),
+            "lexicon_size": len(models.lexicon) if models.lexicon is not None else 0,
+            "sign_index": models.vocabulary.index.name,
+            "memory_bytes": models.memory_usage(),
+            "embedding_cache": models.embedding_cache.stats(),
+            "punctuation_cache": models.punctuation.stats(),
+            "match_tiers": self.match_stats.snapshot(),
+        }
+
+    def _build(self, warm_up: bool) -> LoadedModels:
+        start = time.perf_counter()
+        models = LoadedModels()
+        if warm_up:
+            models.warm_up()
+        self.load_seconds = time.perf_counter() - start
+        print(f"NLP models loaded in {self.load_seconds:.1f}s")
+        return models
+
+
+registry = ModelRegistry()
+
+
+def get_models() -> LoadedModels:
+    return registry.get()
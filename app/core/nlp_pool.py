@@ -0,0 +1,183 @@
+"""NLP worker processes that share the parent's models.
+
+The parent loads the models once, then forks the workers, so each worker
+starts with the models already in its address space instead of loading its
+own copy:
+
+- torch weights are moved to shared memory before the fork, so the pages stay
+  shared whatever a worker does with them
+- the sign matrix and the lexicon are memory-mapped `.npy` files, shared by
+  every process through the page cache
+- gc.freeze() moves every object that exists at fork time out of the
+  collector's reach, so collections in a worker do not write to (and copy)
+  the pages holding them
+- each worker runs torch on NLP_WORKER_THREADS threads, so NLP_WORKERS
+  workers use the cores without oversubscribing them
+
+NLP_START_METHOD=spawn (the default where fork is unavailable, e.g. Windows) gives
+every worker its own copy of the models instead.
+
+The caches fill up inside the workers, so every call also returns the
+embeddings it encoded and its cache hit/miss counts. The parent merges them
+into its own models: its embedding cache is the one saved at shutdown and
+reload, and its counters are the ones /api/models reports.
+"""
+import asyncio
+import gc
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import NLP_WORKERS, NLP_WORKER_THREADS, NLP_START_METHOD
+from app.core.model_registry import registry
+
+
+_started = None
+
+
+def _init_worker(threads: int, started):
+    global _started
+    import torch
+    torch.set_num_threads(threads)
+    _started = started
+
+
+def _worker_pid() -> int:
+    # Every worker waits for the others, so each one answers exactly once
+    _started.wait(timeout=300)
+    return os.getpid()
+
+
+def _run_task(fn, args):
+    """Worker side of NLPPool.run: `fn(*args)`, plus what it added to this
+    worker's caches for the parent to merge."""
+    models = registry.get()
+    cache, punctuation = models.embedding_cache, models.punctuation
+    before = (cache.hits, cache.misses, punctuation.hits, punctuation.misses, punctuation.skipped)
+    cache.added = []
+    try:
+        result = fn(*args)
+        added = cache.added
+    finally:
+        cache.added = None
+    after = (cache.hits, cache.misses, punctuation.hits, punctuation.misses, punctuation.skipped)
+    return result, {
+        "revision": cache.revision,
+        "embeddings": added,
+        "counts": [a - b for a, b in zip(after, before)],
+    }
+
+
+def _merge_report(report: dict):
+    if not registry.loaded:
+        return
+    models = registry.get()
+    cache, punctuation = models.embedding_cache, models.punctuation
+    # Reports of workers still running the models from before a reload are dropped
+    if report["revision"] != cache.revision:
+        return
+    if report["embeddings"]:
+        words, vectors = zip(*report["embeddings"])
+        cache.put_many(words, vectors)
+    embed_hits, embed_misses, punct_hits, punct_misses, punct_skipped = report["counts"]
+    cache.hits += embed_hits
+    cache.misses += embed_misses
+    punctuation.hits += punct_hits
+    punctuation.misses += punct_misses
+    punctuation.skipped += punct_skipped
+
+
+def _memory_kib(pid: int) -> dict:
+    """Resident and proportional set size of `pid` (Linux only)."""
+    usage = {}
+    for name, key in (("status", "VmRSS:"), ("smaps_rollup", "Pss:")):
+        try:
+            with open(f"/proc/{pid}/{name}") as f:
+                for line in f:
+                    if line.startswith(key):
+                        usage["rss_kib" if key == "VmRSS:" else "pss_kib"] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return usage
+
+
+class NLPPool:
+    def __init__(self, workers: int = NLP_WORKERS, threads: int = NLP_WORKER_THREADS, start_method: str = NLP_START_METHOD):
+        self.workers = workers
+        self.threads = threads
+        self.start_method = start_method
+        self.executor = None
+        self._pids = []
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.executor is not None
+
+    def start(self):
+        with self._lock:
+            if self.executor is None:
+                self.executor, self._pids = self._fork()
+
+    async def run(self, fn, *args):
+        """`fn(*args)` in a worker, starting the workers first if needed."""
+        if not self.started:
+            # Loads the models first so the workers inherit them, off the event loop
+            await asyncio.to_thread(self.start)
+        loop = asyncio.get_running_loop()
+        result, report = await loop.run_in_executor(self.executor, _run_task, fn, args)
+        _merge_report(report)
+        return result
+
+    def restart(self):
+        """Fork fresh workers, e.g. after a model reload; work already sent to
+        the old ones finishes first."""
+        with self._lock:
+            old = self.executor
+            self.executor, self._pids = self._fork()
+        if old is not None:
+            old.shutdown(wait=True)
+
+    def shutdown(self):
+        with self._lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+                self._pids = []
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "start_method": self.start_method,
+            "parent": {"pid": os.getpid(), **_memory_kib(os.getpid())},
+            "children": [{"pid": pid, **_memory_kib(pid)} for pid in self._pids],
+        }
+
+    def _fork(self):
+        if self.start_method == "fork":
+            models = registry.load()
+            for module in (models.bert_model, getattr(getattr(models.punct_model, "pipe", None), "model", None)):
+                if module is not None:
+                    module.share_memory()
+            # Workers must not share the tokenizers' Rust thread pool state
+            os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+            gc.collect()
+            gc.freeze()
+
+        context = multiprocessing.get_context(self.start_method)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.threads, context.Barrier(self.workers)),
+        )
+        # Start every worker now, while nothing else is running, not on the first job
+        pids = sorted(f.result() for f in [executor.submit(_worker_pid) for _ in range(self.workers)])
+        print(f"Started {self.workers} NLP workers ({self.start_method}): {pids}")
+        return executor, pids
+
+
+nlp_pool = NLPPool()
@@ -0,0 +1,54 @@
+"""Multi-word signs ("Thank You", "Do Not") matched as phrases.
+
+Phrases are keyed by token tuples, both as written and lemmatized, so "thank
+you", "does not" and "doing not" all find their sign with one dict lookup.
+Transcripts are matched greedily, longest phrase first, on the words before
+stopwords are dropped, since most multi-word signs contain one.
+"""
+
+
+class PhraseIndex:
+    def __init__(self, phrases: dict):
+        # token tuple -> sign name
+        self.phrases = phrases
+        self.max_length = max((len(key) for key in phrases), default=0)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    @classmethod
+    def from_names(cls, names, normalizer) -> "PhraseIndex":
+        """Index the sign names of more than one word, stripped like transcripts are."""
+        split = []
+        for name in names:
+            words = tuple(w for w in normalizer.strip_tokens(str(name).split()) if w)
+            if len(words) > 1:
+                split.append((words, name))
+
+        phrases = {}
+        # Names as written first: "does not" keeps its own sign even though
+        # "Does Not" and "Do Not" lemmatize to the same tuple
+        for words, name in split:
+            phrases.setdefault(words, name)
+        for words, name in split:
+            phrases.setdefault(tuple(normalizer.lemma(w) for w in words), name)
+        return cls(phrases)
+
+    def segment(self, words, lemma) -> list:
+        """Split `words` into (sign name, None) for phrases and (None, word) for
+        the words left to match one by one, in order."""
+        phrases = self.phrases
+        segments = []
+        i = 0
+        while i < len(words):
+            for n in range(min(self.max_length, len(words) - i), 1, -1):
+                key = tuple(words[i:i + n])
+                name = phrases.get(key) or phrases.get(tuple(lemma(w) for w in key))
+                if name is not None:
+                    segments.append((name, None))
+                    i += n
+                    break
+            else:
+                segments.append((None, words[i]))
+                i += 1
+        return segments
@@ -0,0 +1,162 @@
+"""Punctuation restoration in bounded, batched windows.
+
+PunctuationModel.restore_punctuation() runs its token-classification pipeline
+over 230-word chunks one at a time. Here the words are cut into windows of
+PUNCT_WINDOW_WORDS overlapping by PUNCT_WINDOW_OVERLAP, the windows of a call
+go through the pipeline together in batches of PUNCT_BATCH_SIZE, and each word
+takes its label from the window where it is furthest from an edge. Labels of
+recently seen windows are kept in an LRU cache, so repeated phrases and
+re-processed transcripts skip the model.
+
+Text that already reads as punctuated (e.g. from an STT engine that adds it)
+is returned as is.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from app.core.config import (
+    PUNCT_WINDOW_WORDS,
+    PUNCT_WINDOW_OVERLAP,
+    PUNCT_BATCH_SIZE,
+    PUNCT_CACHE_SIZE,
+    PUNCT_SKIP_WORDS_PER_MARK,
+)
+
+SENTENCE_MARK_RE = re.compile(r"[.?!](?:\s|$)")
+
+
+def is_punctuated(text: str, words_per_mark: int = PUNCT_SKIP_WORDS_PER_MARK) -> bool:
+    """True if `text` has at least one sentence mark per `words_per_mark` words."""
+    words = len(text.split())
+    if words == 0:
+        return True
+    marks = len(SENTENCE_MARK_RE.findall(text))
+    return marks > 0 and words / marks <= words_per_mark
+
+
+def plan_windows(count: int, size: int, overlap: int) -> list:
+    """(start, end, own_start, own_end) word ranges covering `count` words.
+
+    Each window owns the words from the middle of its overlap with the previous
+    window to the middle of its overlap with the next one.
+    """
+    if count <= size:
+        return [(0, count, 0, count)]
+    stride = size - overlap
+    starts = list(range(0, count - overlap, stride))
+    windows = []
+    for i, start in enumerate(starts):
+        end = min(start + size, count)
+        own_start = 0 if i == 0 else start + overlap // 2
+        own_end = count if i == len(starts) - 1 else starts[i + 1] + overlap // 2
+        windows.append((start, end, own_start, own_end))
+    return windows
+
+
+def labels_from_entities(words, entities) -> list:
+    """Label of each word of " ".join(words) from the pipeline's per-token output.
+
+    Same rule as PunctuationModel.predict: a word takes the label of its last
+    sub-token. Words past a clipped input keep "0" (no punctuation).
+    """
+    labels = []
+    char_index = 0
+    entity_index = 0
+    for word in words:
+        char_index += len(word) + 1
+        label = "0"
+        while entity_index < len(entities) and char_index > entities[entity_index]["end"]:
+            label = entities[entity_index]["entity"]
+            entity_index += 1
+        labels.append(label)
+    return labels
+
+
+class PunctuationRestorer:
+    def __init__(
+        self,
+        punct_model,
+        window: int = PUNCT_WINDOW_WORDS,
+        overlap: int = PUNCT_WINDOW_OVERLAP,
+        batch_size: int = PUNCT_BATCH_SIZE,
+        cache_size: int = PUNCT_CACHE_SIZE,
+    ):
+        self.punct_model = punct_model
+        self.window = window
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self._labels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def restore(self, text: str, has_punctuation: bool = False) -> str:
+        return self.restore_many([text], has_punctuation)[0]
+
+    def restore_many(self, texts, has_punctuation: bool = False) -> list:
+        """Restored `texts`; `has_punctuation=True` (the STT engine already
+        punctuates) returns them unchanged."""
+        results = list(texts)
+        todo = []
+        for i, text in enumerate(texts):
+            if has_punctuation or is_punctuated(text):
+                self.skipped += 1
+                continue
+            words = self.punct_model.preprocess(text)
+            if words:
+                todo.append((i, words, plan_windows(len(words), self.window, self.overlap)))
+
+        # Label every distinct window of every text in one batched pass
+        window_keys = {
+            " ".join(words[start:end])
+            for _, words, windows in todo
+            for start, end, _, _ in windows
+        }
+        labels = self._window_labels(list(window_keys))
+
+        for i, words, windows in todo:
+            word_labels = []
+            for start, end, own_start, own_end in windows:
+                key_labels = labels[" ".join(words[start:end])]
+                word_labels.extend(key_labels[own_start - start:own_end - start])
+            prediction = [[word, label, None] for word, label in zip(words, word_labels)]
+            results[i] = self.punct_model.prediction_to_text(prediction)
+        return results
+
+    def _window_labels(self, keys) -> dict:
+        labels = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                cached = self._labels.get(key)
+                if cached is None:
+                    missing.append(key)
+                else:
+                    self._labels.move_to_end(key)
+                    labels[key] = cached
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            outputs = self.punct_model.pipe(missing, batch_size=self.batch_size)
+            new = {key: labels_from_entities(key.split(" "), entities) for key, entities in zip(missing, outputs)}
+            labels.update(new)
+            with self._lock:
+                self._labels.update(new)
+                while len(self._labels) > self.cache_size:
+                    self._labels.popitem(last=False)
+        return labels
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._labels),
+            "max_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "skipped": self.skipped,
+        }
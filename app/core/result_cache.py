@@ -0,0 +1,144 @@
+"""Per-user cache of serialized API responses, with ETags.
+
+Entries are keyed by user, a per-user generation and the response name.
+Anything that changes a user's data calls invalidate(username), which bumps
+the generation: older entries are never read again and age out by TTL/LRU,
+and a request that read the data before the change can only store it under
+the old generation.
+
+The "memory" backend lives in the API process; with several API processes
+use "redis" (needs the `redis` package) so an invalidation reaches them all.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import RESULT_CACHE_BACKEND, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, REDIS_URL
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest use first
+        # Kept apart from the entries so LRU eviction never resets a generation
+        self._counters = {}
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    def __init__(self, url: str = REDIS_URL, ttl: float = RESULT_CACHE_TTL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESULT_CACHE_BACKEND=redis needs the `redis` package (pip install redis)")
+        self.ttl = ttl
+        # Evicts by the server's maxmemory policy, entries expire by TTL
+        self._redis = redis.Redis.from_url(url)
+
+    async def get(self, key: str):
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes):
+        await self._redis.set(key, value, ex=max(1, int(self.ttl)))
+
+    async def counter(self, key: str) -> int:
+        return int(await self._redis.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    def __len__(self):
+        return 0  # not tracked locally
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResultCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def key(self, username: str, name: str) -> str:
+        """Key of response `name` at the user's current generation. Take it
+        before loading the data, and store under the same key."""
+        generation = await self.backend.counter(f"gen:{username}")
+        return f"result:{username}:{generation}:{name}"
+
+    async def get(self, key: str):
+        """(etag, JSON body) of the cached response, or None."""
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Stored as <etag>\n<body>
+        etag, body = value.split(b"\n", 1)
+        return etag.decode(), body
+
+    async def set(self, key: str, payload):
+        """Serialize `payload`, cache it and return (etag, JSON body)."""
+        body = json.dumps(jsonable_encoder(payload)).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        await self.backend.set(key, etag.encode() + b"\n" + body)
+        return etag, body
+
+    async def invalidate(self, username: str):
+        await self.backend.incr(f"gen:{username}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _build_backend(name: str = RESULT_CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown result cache backend: {name} (expected memory or redis)")
+
+
+result_cache = ResultCache(_build_backend())
@@ -0,0 +1,132 @@
+"""Nearest-neighbour search over the normalized sign matrix.
+
+Every index takes L2-normalized query rows and returns, per row, the index of
+the most similar sign and its cosine similarity. `ExactIndex` scans the whole
+vocabulary; `IVFIndex` clusters the vocabulary offline and only scans the
+`nprobe` closest clusters, which keeps lookups cheap for large dictionaries.
+
+    python -m app.core.sign_index build   # build the IVF index from the sign CSV
+"""
+import os
+import sys
+
+import numpy as np
+
+from app.core.config import SIGN_INDEX, SIGN_INDEX_PATH, IVF_NLIST, IVF_NPROBE
+
+
+class ExactIndex:
+    name = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def search(self, queries):
+        similarities = queries @ self.matrix.T
+        best = similarities.argmax(axis=1)
+        return best, similarities[np.arange(len(best)), best]
+
+
+def matrix_fingerprint(matrix) -> np.ndarray:
+    # Cheap identity check so an index built for another vocabulary is not reused
+    return np.array([matrix.shape[0], matrix.shape[1], float(np.asarray(matrix[::97]).sum())])
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means centroids, each owning a list of
+    sign rows. Search re-ranks the probed rows exactly, so a query only misses
+    its true neighbour when that neighbour sits in an unprobed cluster."""
+
+    name = "ivf"
+
+    def __init__(self, matrix, centroids, order, offsets, nprobe: int = IVF_NPROBE):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = max(1, min(nprobe, len(centroids)))
+
+    @classmethod
+    def build(cls, matrix, nlist: int = IVF_NLIST, iterations: int = 20, seed: int = 0, nprobe: int = IVF_NPROBE):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(seed)
+
+        centroids = matrix[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = (matrix @ centroids.T).argmax(axis=1)
+            for c in range(nlist):
+                members = matrix[assignment == c]
+                # Re-seed empty clusters on a random row
+                centroid = members.sum(axis=0) if len(members) else matrix[rng.integers(n)].copy()
+                norm = np.linalg.norm(centroid)
+                centroids[c] = centroid / norm if norm else centroid
+
+        assignment = (matrix @ centroids.T).argmax(axis=1)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        return cls(matrix, centroids, order, offsets, nprobe)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            centroids=self.centroids,
+            order=self.order,
+            offsets=self.offsets,
+            fingerprint=matrix_fingerprint(self.matrix),
+        )
+
+    @classmethod
+    def load(cls, matrix, path: str, nprobe: int = IVF_NPROBE):
+        """The saved index for `matrix`, or None if missing or built for another vocabulary."""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        if not np.allclose(data["fingerprint"], matrix_fingerprint(matrix)):
+            return None
+        return cls(matrix, data["centroids"], data["order"], data["offsets"], nprobe)
+
+    def search(self, queries):
+        best = np.zeros(len(queries), dtype=np.int64)
+        best_similarities = np.full(len(queries), -1.0, dtype=np.float32)
+        probes = np.argpartition(-(queries @ self.centroids.T), self.nprobe - 1, axis=1)[:, :self.nprobe]
+
+        # One matrix product per probed cluster, covering every query that probes it
+        for c in np.unique(probes):
+            rows = self.order[self.offsets[c]:self.offsets[c + 1]]
+            if len(rows) == 0:
+                continue
+            query_ids = np.nonzero((probes == c).any(axis=1))[0]
+            similarities = queries[query_ids] @ self.matrix[rows].T
+            local_best = similarities.argmax(axis=1)
+            local_similarities = similarities[np.arange(len(query_ids)), local_best]
+            better = local_similarities > best_similarities[query_ids]
+            best[query_ids[better]] = rows[local_best[better]]
+            best_similarities[query_ids[better]] = local_similarities[better]
+        return best, best_similarities
+
+
+def load_index(matrix, backend: str = SIGN_INDEX):
+    if backend == ExactIndex.name:
+        return ExactIndex(matrix)
+    if backend == IVFIndex.name:
+        index = IVFIndex.load(matrix, SIGN_INDEX_PATH)
+        if index is None:
+            print(f"No IVF index for this vocabulary at {SIGN_INDEX_PATH}, building it now")
+            index = IVFIndex.build(matrix)
+            index.save(SIGN_INDEX_PATH)
+        return index
+    raise ValueError(f"Unknown sign index backend: {backend}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        sys.exit(__doc__)
+    from app.core.sign_vocabulary import SignVocabulary
+
+    vocabulary = SignVocabulary.load()
+    IVFIndex.build(vocabulary.matrix).save(SIGN_INDEX_PATH)
+    print(f"Built IVF index for {len(vocabulary)} signs at {SIGN_INDEX_PATH}")
@@ -0,0 +1,88 @@
+"""Dictionary tiers tried before the embedding model.
+
+Words that, as written or lemmatized, are literally a sign name, or are
+listed in the synonyms CSV (SIGN_SYNONYMS_PATH, columns WORD and SIGN),
+resolve with one dict lookup; only the rest need BERT and the sign index. MatchStats counts how many words
+(or phrases) each tier resolved.
+"""
+import csv
+import os
+import threading
+
+from app.core.config import SIGN_SYNONYMS_PATH
+
+TIERS = ("phrase", "exact", "synonym", "lexicon", "embedding", "spelled")
+
+
+def _single_word(normalizer, text: str):
+    words = [w for w in normalizer.strip_tokens(str(text).split()) if w]
+    return words[0] if len(words) == 1 else None
+
+
+class ExactLookup:
+    def __init__(self, exact: dict, synonyms: dict):
+        # lowercased sign name -> sign name
+        self.exact = exact
+        # lowercased word or lemma -> sign name
+        self.synonyms = synonyms
+
+    def __len__(self):
+        return len(self.exact) + len(self.synonyms)
+
+    @classmethod
+    def build(cls, names, normalizer, synonyms_path: str = SIGN_SYNONYMS_PATH) -> "ExactLookup":
+        # Keyed on the names as written only: lemmatizing them files e.g. the
+        # "Left" sign under "leave", which is no exact match
+        exact = {}
+        for name in names:
+            word = _single_word(normalizer, name)
+            if word:
+                exact.setdefault(word, name)
+
+        synonyms = {}
+        if synonyms_path and os.path.exists(synonyms_path):
+            known = set(names)
+            with open(synonyms_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    word = _single_word(normalizer, row.get("WORD", ""))
+                    sign = (row.get("SIGN") or "").strip()
+                    if word and sign in known:
+                        synonyms.setdefault(word, sign)
+                        synonyms.setdefault(normalizer.lemma(word), sign)
+            print(f"Loaded {len(synonyms)} sign synonyms from {synonyms_path}")
+        return cls(exact, synonyms)
+
+    def find(self, word: str, lemma: str):
+        """(sign name, tier) for `word` or its `lemma`, or (None, None). The
+        exact tier only matches a sign's own name."""
+        name = self.exact.get(word) or self.exact.get(lemma)
+        if name is not None:
+            return name, "exact"
+        name = self.synonyms.get(word) or self.synonyms.get(lemma)
+        if name is not None:
+            return name, "synonym"
+        return None, None
+
+
+class MatchStats:
+    """Words (phrases count once) resolved per tier, summed over every NLP call of this process
+    and of the NLP workers (each call returns its own counts)."""
+
+    def __init__(self):
+        self._counts = dict.fromkeys(TIERS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, counts: dict):
+        with self._lock:
+            for tier, count in counts.items():
+                self._counts[tier] = self._counts.get(tier, 0) + count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "lookups": total,
+            "tiers": counts,
+            "rates": {tier: count / total if total else 0.0 for tier, count in counts.items()},
+        }
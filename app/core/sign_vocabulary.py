@@ -0,0 +1,68 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import WORD_VECTORS_PATH, SIGN_MATRIX_PATH, SIGN_INDEX
+from app.core.sign_index import load_index
+
+
+def l2_normalize(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Zero rows stay zero (similarity 0), same as sklearn's cosine_similarity
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def build_matrix(csv_path: str = WORD_VECTORS_PATH, matrix_path: str = SIGN_MATRIX_PATH):
+    """Convert the sign CSV into an L2-normalized float32 `.npy` plus a `.json` of names."""
+    word_df = pd.read_csv(csv_path)
+    matrix = l2_normalize(word_df.drop(columns=["WORD_NAME"]).values)
+    names = word_df["WORD_NAME"].tolist()
+
+    os.makedirs(os.path.dirname(matrix_path) or ".", exist_ok=True)
+    np.save(f"{matrix_path}.npy", matrix)
+    with open(f"{matrix_path}.json", "w", encoding="utf-8") as f:
+        json.dump(names, f)
+    print(f"Built sign matrix {matrix.shape} at {matrix_path}.npy")
+
+
+def _is_stale(csv_path: str, matrix_path: str) -> bool:
+    built = [f"{matrix_path}.npy", f"{matrix_path}.json"]
+    if not all(os.path.exists(p) for p in built):
+        return True
+    return os.path.getmtime(csv_path) > min(os.path.getmtime(p) for p in built)
+
+
+class SignVocabulary:
+    """Sign names and their unit-length vectors, searched through a pluggable
+    nearest-neighbour index (see app.core.sign_index)."""
+
+    def __init__(self, names, matrix, backend: str = SIGN_INDEX):
+        self.names = names
+        self.matrix = matrix
+        self.index = load_index(matrix, backend)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, csv_path: str = WORD_VECTORS_PATH, matrix_path: str = SIGN_MATRIX_PATH, backend: str = SIGN_INDEX):
+        if _is_stale(csv_path, matrix_path):
+            build_matrix(csv_path, matrix_path)
+        with open(f"{matrix_path}.json", encoding="utf-8") as f:
+            names = json.load(f)
+        matrix = np.load(f"{matrix_path}.npy", mmap_mode="r")
+        return cls(names, matrix, backend)
+
+    def match(self, vectors):
+        """Best sign index and its cosine similarity for every row of `vectors`."""
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return self.index.search(l2_normalize(vectors))
+
+
+if __name__ == "__main__":
+    build_matrix()
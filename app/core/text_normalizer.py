@@ -0,0 +1,110 @@
+"""Transcript normalization: lowercase, strip punctuation, drop stopwords, lemmatize.
+
+A TextNormalizer builds its patterns, stopword set and lemmatizer once. The
+punctuation regex runs once over all the tokens of a call instead of once per
+word, and lemmas are memoized, so a transcript mostly costs dict lookups.
+"""
+import re
+import threading
+from functools import lru_cache
+
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+WHITESPACE_RE = re.compile(r"\s+")
+LEMMA_CACHE_SIZE = 100_000
+
+# Clitics split off by word_tokenize ("don't" -> "do", "n't")
+CONTRACTIONS = {"n't": "not", "'m": "am", "'re": "are", "'ll": "will", "'ve": "have"}
+
+# Pronouns, modals and negation carry meaning for signing, keep them even
+# though they are stopwords ("isn't" must not turn into "is")
+KEEP_WORDS = frozenset({
+    'i', 'you', 'he', 'she', 'it', 'we', 'they',
+    'me', 'him', 'her', 'us', 'them', 'my', 'your',
+    'his', 'its', 'our', 'their', 'can', 'could', 'will',
+    'would', 'shall', 'should', 'may', 'might', 'must',
+    'not', 'no'
+})
+
+
+class TextNormalizer:
+    def __init__(
+        self,
+        stop_words=None,
+        keep_words=KEEP_WORDS,
+        contractions=CONTRACTIONS,
+        lemma_cache_size: int = LEMMA_CACHE_SIZE,
+    ):
+        if stop_words is None:
+            stop_words = stopwords.words('english')
+        self.drop_words = frozenset(stop_words) - frozenset(keep_words)
+        self.contractions = contractions
+        self._lemmatizer = WordNetLemmatizer()
+        self.lemma = lru_cache(maxsize=lemma_cache_size)(self._lemmatize)
+
+    def _lemmatize(self, word: str) -> str:
+        return self._lemmatizer.lemmatize(word, pos='v')
+
+    def strip_tokens(self, tokens) -> list:
+        """Tokens lowercased and without punctuation, contractions spelled out.
+        Tokens that were only punctuation become empty strings."""
+        # Tokens never contain whitespace, so one pass over them joined by
+        # newlines strips punctuation from each and splits back the same way
+        contractions = self.contractions
+        joined = '\n'.join(contractions.get(token.lower(), token) for token in tokens)
+        return PUNCTUATION_RE.sub('', joined.lower()).split('\n')
+
+    def keeps(self, word: str) -> bool:
+        return bool(word) and word not in self.drop_words
+
+    def normalize_tokens(self, tokens) -> list:
+        """Lemmas of the tokens that are words and not stopwords, in order."""
+        drop_words = self.drop_words
+        lemma = self.lemma
+        return [lemma(word) for word in self.strip_tokens(tokens) if word and word not in drop_words]
+
+    def normalize(self, text: str) -> list:
+        return self.normalize_tokens(word_tokenize(text))
+
+    def normalize_many(self, texts) -> list:
+        """normalize() for each text, with a single regex pass for all of them."""
+        tokenized = [word_tokenize(text) for text in texts]
+        # An empty line marks the end of each text
+        flat = [token for tokens in tokenized for token in tokens + ['']]
+        stripped = self.strip_tokens(flat)
+
+        drop_words = self.drop_words
+        lemma = self.lemma
+        results = []
+        start = 0
+        for tokens in tokenized:
+            words = stripped[start:start + len(tokens)]
+            start += len(tokens) + 1
+            results.append([lemma(word) for word in words if word and word not in drop_words])
+        return results
+
+    def clean_sentence(self, sentence) -> str:
+        """Whole-sentence variant: punctuation is removed before tokenizing."""
+        sentence = PUNCTUATION_RE.sub('', str(sentence).lower())
+        sentence = WHITESPACE_RE.sub(' ', sentence).strip()
+        tokens = word_tokenize(sentence)
+        return ' '.join(self.lemma(word) for word in tokens if word not in self.drop_words)
+
+    def cache_info(self):
+        return self.lemma.cache_info()
+
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def get_text_normalizer() -> TextNormalizer:
+    """The shared normalizer of this process, built on first use."""
+    global _normalizer
+    with _normalizer_lock:
+        if _normalizer is None:
+            _normalizer = TextNormalizer()
+        return _normalizer
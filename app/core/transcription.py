@@ -0,0 +1,194 @@
+"""Speech-to-text backends.
+
+A backend turns audio (a file, or an iterator of byte chunks) into a list of
+segments, each a dict with "text", "start", "end" (seconds) and "words"
+([word, start, end] triples, empty when the engine has no timings). The
+transcript is the text of every segment joined, not just the first one.
+
+The backend is picked with STT_BACKEND:
+- "watson": IBM Watson Speech to Text (app.core.watson_client)
+- "vosk": offline Kaldi models through the optional `vosk` package
+- "stub": no engine; reads `<audio>.txt` next to the file, or STUB_TRANSCRIPT
+"""
+import asyncio
+import json
+import os
+import subprocess
+import threading
+
+from app.core.config import STT_BACKEND, VOSK_MODEL_PATH, STUB_TRANSCRIPT, FFMPEG_PATH, TRANSCRIBE_CONCURRENCY
+from app.core.ffmpeg import SyncChunkIterator
+
+CONTENT_TYPES = {
+    ".mp3": "audio/mp3",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".flac": "audio/flac",
+    ".webm": "audio/webm",
+}
+
+# Limits concurrent speech-to-text calls across the whole app: whole files,
+# long-audio chunks and live windows all take a slot per engine call
+transcribe_slots = asyncio.Semaphore(TRANSCRIBE_CONCURRENCY)
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+def content_type_for(audio_path: str) -> str:
+    ext = os.path.splitext(audio_path)[1].lower()
+    return CONTENT_TYPES.get(ext, "application/octet-stream")
+
+
+def join_segments(segments) -> str:
+    return " ".join(s["text"].strip() for s in segments if s["text"].strip())
+
+
+async def run_transcription(fn, *args):
+    """Run the blocking engine call `fn(*args)` in a thread, holding a transcribe slot."""
+    async with transcribe_slots:
+        return await asyncio.to_thread(fn, *args)
+
+
+class TranscriptionBackend:
+    name = None
+    # True when transcripts already come with sentence punctuation
+    provides_punctuation = False
+
+    def transcribe_segments(self, audio_path: str) -> list:
+        raise NotImplementedError
+
+    def transcribe_stream_segments(self, chunks, content_type: str) -> list:
+        raise NotImplementedError
+
+    def transcribe(self, audio_path: str) -> str:
+        return join_segments(self.transcribe_segments(audio_path))
+
+    def transcribe_stream(self, chunks, content_type: str) -> str:
+        return join_segments(self.transcribe_stream_segments(chunks, content_type))
+
+    async def atranscribe(self, audio_path: str) -> str:
+        return await asyncio.to_thread(self.transcribe, audio_path)
+
+    async def atranscribe_stream(self, chunks, content_type: str) -> str:
+        """`chunks` is an async iterator of bytes, consumed as the engine reads it."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.to_thread(self.transcribe_stream, SyncChunkIterator(chunks, loop), content_type)
+        finally:
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+
+
+class StubBackend(TranscriptionBackend):
+    """Stand-in engine for tests and demos, no audio is actually decoded."""
+
+    name = "stub"
+
+    def transcribe_segments(self, audio_path: str) -> list:
+        sidecar = os.path.splitext(audio_path)[0] + ".txt"
+        text = STUB_TRANSCRIPT
+        if os.path.exists(sidecar) and sidecar != audio_path:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                text = f.read()
+        return [{"text": text, "start": 0.0, "end": 0.0, "words": []}]
+
+    def transcribe_stream_segments(self, chunks, content_type: str) -> list:
+        for _ in chunks:
+            pass
+        return [{"text": STUB_TRANSCRIPT, "start": 0.0, "end": 0.0, "words": []}]
+
+
+class VoskBackend(TranscriptionBackend):
+    """Offline transcription with a local Vosk/Kaldi model (VOSK_MODEL_PATH).
+
+    Audio of any format is decoded to 16 kHz mono PCM by ffmpeg first.
+    """
+
+    name = "vosk"
+    sample_rate = 16000
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        try:
+            import vosk
+        except ImportError:
+            raise TranscriptionError("STT_BACKEND=vosk needs the `vosk` package (pip install vosk)")
+        if not os.path.isdir(model_path):
+            raise TranscriptionError(f"Vosk model not found at {model_path}")
+        self._vosk = vosk
+        self._model = vosk.Model(model_path)
+
+    def transcribe_segments(self, audio_path: str) -> list:
+        with open(audio_path, "rb") as f:
+            return self.transcribe_stream_segments(iter(lambda: f.read(64 * 1024), b""), content_type_for(audio_path))
+
+    def transcribe_stream_segments(self, chunks, content_type: str) -> list:
+        proc = subprocess.Popen(
+            [FFMPEG_PATH, "-i", "pipe:0", "-ac", "1", "-ar", str(self.sample_rate), "-f", "s16le", "pipe:1"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        # Feed ffmpeg from a thread while this one reads the decoded PCM
+        feeder = threading.Thread(target=self._feed, args=(proc, chunks), daemon=True)
+        feeder.start()
+
+        recognizer = self._vosk.KaldiRecognizer(self._model, self.sample_rate)
+        recognizer.SetWords(True)
+        segments = []
+        try:
+            while True:
+                pcm = proc.stdout.read(8000)
+                if not pcm:
+                    break
+                if recognizer.AcceptWaveform(pcm):
+                    segments.append(self._segment(recognizer.Result()))
+            segments.append(self._segment(recognizer.FinalResult()))
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            feeder.join()
+        if proc.returncode != 0:
+            raise TranscriptionError("ffmpeg could not decode the audio")
+        return [s for s in segments if s["text"]]
+
+    @staticmethod
+    def _feed(proc, chunks):
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        finally:
+            proc.stdin.close()
+
+    @staticmethod
+    def _segment(result_json: str) -> dict:
+        result = json.loads(result_json)
+        words = [[w["word"], w["start"], w["end"]] for w in result.get("result", [])]
+        return {
+            "text": result.get("text", ""),
+            "start": words[0][1] if words else 0.0,
+            "end": words[-1][2] if words else 0.0,
+            "words": words,
+        }
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_transcription_backend(name: str = STT_BACKEND) -> TranscriptionBackend:
+    with _backends_lock:
+        if name not in _backends:
+            if name == "watson":
+                from app.core.watson_client import WatsonBackend
+                _backends[name] = WatsonBackend()
+            elif name == "vosk":
+                _backends[name] = VoskBackend()
+            elif name == "stub":
+                _backends[name] = StubBackend()
+            else:
+                raise ValueError(f"Unknown STT backend: {name}")
+        return _backends[name]
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import os
+
+from fastapi import HTTPException, Request, UploadFile
+
+from app.core.config import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE
+
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)")
+
+
+def check_content_length(request: Request, max_bytes: int = MAX_UPLOAD_BYTES):
+    """Reject a request whose body can't fit an upload of `max_bytes`.
+
+    Call it before reading the form: Starlette's multipart parser spools the
+    whole file to disk before save_upload sees any of it.
+    """
+    length = request.headers.get("content-length")
+    if length is None:
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    if not length.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if int(length) > max_bytes + MULTIPART_OVERHEAD:
+        raise _too_large(max_bytes)
+
+
+async def save_upload(
+    file: UploadFile,
+    dest_path: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+):
+    """Stream `file` to `dest_path` one chunk at a time.
+
+    Returns (size in bytes, sha256 hex digest). Only one chunk is held in
+    memory; the size limit is enforced while streaming and a partial file is
+    removed if the upload is rejected or fails.
+    """
+    # Reject early when the client told us the size
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    finally:
+        await file.close()
+
+    return size, digest.hexdigest()
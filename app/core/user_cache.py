@@ -0,0 +1,66 @@
+"""Short-lived cache of the users behind access tokens.
+
+get_current_user runs on every authenticated request (every video fetch
+during playback), so the User row for a token subject is kept for
+AUTH_CACHE_TTL seconds instead of being queried each time. Updating or
+deleting a User through the ORM drops its entry at once; changes made
+outside the app show up after at most the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+
+from app.core.config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL
+from app.db.models.user import User
+
+
+class UserCache:
+    def __init__(self, max_entries: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._users = OrderedDict()  # username -> (expires_at, User), oldest use first
+        # Invalidation also comes from ORM flushes, which may run in other threads
+        self._lock = threading.Lock()
+
+    def get(self, username: str):
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._users[username]
+                return None
+            self._users.move_to_end(username)
+            return user
+
+    def put(self, user: User):
+        """Cache `user`, a row loaded in full (it is used detached from its session)."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._users[user.username] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(user.username)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._users.pop(username, None)
+
+    def __len__(self):
+        return len(self._users)
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_changed_user(mapper, connection, target):
+    user_cache.invalidate(target.username)
+    # After a rename the old name is still cached
+    for username in inspect(target).attrs.username.history.deleted:
+        user_cache.invalidate(username)
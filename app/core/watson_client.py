@@ -1,27 +1,48 @@
 from ibm_watson import SpeechToTextV1
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 
-# Initialize Watson Speech to Text
-authenticator = IAMAuthenticator('jShe-jO7ss8tqSOoz2AiLw2I6LZRFJ4cfG3hjfyrYwym')  # Replace with your API key
-speech_to_text = SpeechToTextV1(authenticator=authenticator)
-speech_to_text.set_service_url('https://api.au-syd.speech-to-text.watson.cloud.ibm.com/instances/65ba7de0-49e5-45c8-8889-1aaad8a468ad')  # Replace with your service URL
+from app.core.config import WATSON_API_KEY, WATSON_URL, WATSON_MODEL
+from app.core.transcription import TranscriptionBackend, TranscriptionError, content_type_for
 
-def transcribe_audio_with_watson(audio_path: str) -> str:
-    try:
+
+class WatsonBackend(TranscriptionBackend):
+    name = "watson"
+
+    def __init__(self):
+        if not WATSON_API_KEY or not WATSON_URL:
+            raise TranscriptionError(
+                "STT_BACKEND=watson needs WATSON_API_KEY and WATSON_URL (the service instance credentials)"
+            )
+        # Initialize Watson Speech to Text
+        authenticator = IAMAuthenticator(WATSON_API_KEY)
+        self.speech_to_text = SpeechToTextV1(authenticator=authenticator)
+        self.speech_to_text.set_service_url(WATSON_URL)
+
+    def transcribe_segments(self, audio_path: str) -> list:
         with open(audio_path, 'rb') as audio_file:
-            response = speech_to_text.recognize(
-                audio=audio_file,
-                content_type='audio/mp3',  # Use 'audio/wav' for WAV files
-                model='en-US_BroadbandModel',  # Adjust language model as needed
-            ).get_result()
+            return self.transcribe_stream_segments(audio_file, content_type_for(audio_path))
 
-        # Extract the transcription text
-        if 'results' in response and len(response['results']) > 0:
-            transcript = response['results'][0]['alternatives'][0]['transcript']
-            return transcript
-        else:
-            return "No transcription results returned."
-    
-    except Exception as e:
-        return f"Transcription failed: {str(e)}"
+    def transcribe_stream_segments(self, chunks, content_type: str) -> list:
+        # `chunks` may be a file or any iterator of bytes (sent as a chunked upload)
+        try:
+            response = self.speech_to_text.recognize(
+                audio=chunks,
+                content_type=content_type,
+                model=WATSON_MODEL,
+                timestamps=True,
+            ).get_result()
+        except Exception as e:
+            raise TranscriptionError(f"Transcription failed: {str(e)}")
 
+        # Long audio comes back as several results, keep all of them
+        segments = []
+        for result in response.get('results', []):
+            best = result['alternatives'][0]
+            words = best.get('timestamps', [])
+            segments.append({
+                "text": best['transcript'],
+                "start": words[0][1] if words else 0.0,
+                "end": words[-1][2] if words else 0.0,
+                "words": words,
+            })
+        return segments
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from sqlalchemy.sql import select
 from app.db.database import Base
 from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+
+# Postgres arrays, stored as JSON where there are none (SQLite in tests)
+StringList = ARRAY(String).with_variant(JSON, "sqlite")
+# SQLite keeps timestamps as text and CURRENT_TIMESTAMP has whole seconds, bound
+# values must match that format to compare correctly (history cursors)
+Timestamp = DateTime(timezone=True).with_variant(SQLITE_DATETIME(truncate_microseconds=True), "sqlite")
 
 class MediaFile(Base):
     __tablename__ = "media_files"
@@ -11,7 +19,30 @@ class MediaFile(Base):
     filename = Column(String, nullable=False)
     path = Column(String, nullable=False)
     transcription_path = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    video_ids = Column(ARRAY(String))
+    # Full text only loads when asked for (undefer), listings use the preview
+    transcription = deferred(Column(Text))
+    preview = Column(String)
+    # Whether preview is only the start of the transcript
+    preview_truncated = Column(Boolean)
+    transcription_length = Column(Integer)
+    created_at = Column(Timestamp, server_default=func.now())
+    video_ids = Column(StringList)
+    content_hash = Column(String(64), index=True)
+
+    __table_args__ = (
+        # A user's history, newest first: /api/history pages walk this index
+        Index("ix_media_files_username_created_at", username, created_at.desc(), id.desc()),
+    )
+
+class MediaContent(Base):
+    # One row per distinct uploaded file (sha256), shared by every MediaFile
+    # with that content. ref_count tracks how many MediaFile rows point here.
+    __tablename__ = "media_contents"
+    content_hash = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)
+    transcription_path = Column(String)
+    video_ids = Column(StringList)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(Timestamp, server_default=func.now())
 
 print(select(MediaFile.id))
\ No newline at end of file
@@ -1,10 +1,9 @@
 from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
 
 # Import your existing routers
 from app.api.routes import user, audio
-from app.core.dependencies import get_current_user
-from app.db.database import get_db
+from app.core.dependencies import get_admin_user, get_current_user
+from app.db.database import create_schema, engine, get_db
 from app.db.models.file import MediaFile
 from app.db.models.user import User
 
@@ -12,9 +11,37 @@ from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 
-app = FastAPI()
+from app.core.config import PRELOAD_MODELS, NLP_WORKERS
+from app.core.jobs import job_queue
+from app.core.model_registry import registry
+from app.core.nlp_pool import nlp_pool
+from app.core.result_cache import result_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables and indexes added since the database was set up (e.g. media_contents)
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+    # Load the NLP models once per process, requests then only run inference
+    if PRELOAD_MODELS:
+        await asyncio.to_thread(registry.load)
+        if NLP_WORKERS > 0:
+            # Fork the workers before serving, they inherit the loaded models
+            await asyncio.to_thread(nlp_pool.start)
+    yield
+    job_queue.shutdown()
+    registry.save_cache()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+# Model reload and worker restart, one at a time
+_reload_lock = asyncio.Lock()
 
 
 # Configure CORS
@@ -75,6 +102,23 @@ app.include_router(audio.router)
 @app.get("/validate_token")
 async def validate_token(current_user: User = Depends(get_current_user)):
     return {"valid": True}
+
+@app.get("/api/models")
+async def models_status(current_user: User = Depends(get_current_user)):
+    return {**registry.status(), "nlp_pool": nlp_pool.status(), "result_cache": result_cache.stats()}
+
+@app.post("/api/models/reload")
+async def reload_models(current_user: User = Depends(get_admin_user)):
+    # A reload loads a second copy of every model, refuse rather than queue another
+    if _reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+    async with _reload_lock:
+        await asyncio.to_thread(registry.reload)
+        if nlp_pool.started:
+            # The workers hold the old models
+            await asyncio.to_thread(nlp_pool.restart)
+    return {**registry.status(), "nlp_pool": nlp_pool.status(), "result_cache": result_cache.stats()}
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Transcription API"}
\ No newline at end of file
@@ -1,5 +1,6 @@
 document.addEventListener("DOMContentLoaded", () => {
   const API_BASE_URL = "" // Empty string for same-origin requests
+  const HISTORY_PAGE_SIZE = 20 // Items fetched per page
 
   // Function to display alerts
   function showAlert(type, message) {
@@ -41,8 +42,11 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
-  // Load user's transcription history
-  async function loadHistory() {
+  let nextCursor = null
+
+  // Load one page of the user's transcription history; without a cursor the
+  // list starts over from the newest item
+  async function loadHistory(cursor = null) {
     try {
       const token = localStorage.getItem("token")
       if (!token) {
@@ -59,8 +63,11 @@ document.addEventListener("DOMContentLoaded", () => {
         return
       }
 
-      // This endpoint would need to be implemented in your backend
-      const response = await fetch(`/api/history`, {
+      const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE })
+      if (cursor) {
+        params.set("cursor", cursor)
+      }
+      const response = await fetch(`/api/history?${params}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -70,9 +77,16 @@ document.addEventListener("DOMContentLoaded", () => {
         throw new Error("Failed to load history")
       }
 
-      const history = await response.json()
+      const page = await response.json()
+      nextCursor = page.next_cursor
+      updateLoadMore()
+
+      if (!cursor) {
+        // Clear all existing items before adding the first page
+        historyList.querySelectorAll(".history-item").forEach((item) => item.remove())
+      }
 
-      if (history.length === 0) {
+      if (page.items.length === 0 && !cursor) {
         if (emptyHistory) {
           emptyHistory.classList.remove("hidden")
         }
@@ -83,11 +97,8 @@ document.addEventListener("DOMContentLoaded", () => {
         emptyHistory.classList.add("hidden")
       }
 
-      // Clear all existing items before adding new ones
-      historyList.innerHTML = ''
-
       // Add history items
-      history.forEach((item) => {
+      page.items.forEach((item) => {
         const historyItem = document.createElement("div")
         historyItem.className = "history-item"
 
@@ -104,8 +115,11 @@ document.addEventListener("DOMContentLoaded", () => {
             <span class="history-item-date">${new Date(item.created_at).toLocaleString()}</span>
           </div>
           <span class="history-item-type ${typeClass}">${typeClass.replace("type-", "")}</span>
-          <div class="history-item-transcription">${item.transcription}</div>
+          <div class="history-item-transcription"></div>
           <div class="history-item-actions">
+            ${item.truncated ? `<button class="btn btn-secondary btn-expand" data-id="${item.id}">
+              <i class="fas fa-expand"></i> Show full text
+            </button>` : ""}
             <button class="btn btn-secondary btn-download" data-id="${item.id}">
               <i class="fas fa-download"></i> Download
             </button>
@@ -115,6 +129,7 @@ document.addEventListener("DOMContentLoaded", () => {
           </div>
         `
 
+        historyItem.querySelector(".history-item-transcription").textContent = item.preview
         historyList.appendChild(historyItem)
       })
 
@@ -128,6 +143,11 @@ document.addEventListener("DOMContentLoaded", () => {
         button.removeEventListener("click", handleDelete) // Remove previous listeners
         button.addEventListener("click", handleDelete)
       })
+
+      document.querySelectorAll(".btn-expand").forEach((button) => {
+        button.removeEventListener("click", handleExpand) // Remove previous listeners
+        button.addEventListener("click", handleExpand)
+      })
       
     } catch (error) {
       showAlert("error", "Failed to load history. Please try again later.")
@@ -135,6 +155,34 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
+  // Fetch the full transcription, the history list only has a preview
+  async function fetchTranscription(itemId) {
+    const token = localStorage.getItem("token")
+    const response = await fetch(`/api/transcriptions/${itemId}`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    })
+
+    if (!response.ok) {
+      throw new Error("Failed to load transcription")
+    }
+    return response.text()
+  }
+
+  // Replace an item's preview with its full transcription
+  async function expandTranscription(button) {
+    try {
+      const transcription = await fetchTranscription(button.getAttribute("data-id"))
+      const historyItem = button.closest(".history-item")
+      historyItem.querySelector(".history-item-transcription").textContent = transcription
+      button.remove()
+    } catch (error) {
+      showAlert("error", "Failed to load the full transcription.")
+      console.error("Expand error:", error)
+    }
+  }
+
   // Download transcription function
   async function downloadTranscription(itemId) {
     try {
@@ -145,17 +193,7 @@ document.addEventListener("DOMContentLoaded", () => {
         return
       }
 
-      const response = await fetch(`/api/transcriptions/${itemId}`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      })
-
-      if (!response.ok) {
-        throw new Error("Failed to download transcription")
-      }
-
-      const transcription = await response.text()
+      const transcription = await fetchTranscription(itemId)
 
       const blob = new Blob([transcription], { type: "text/plain" })
       const url = URL.createObjectURL(blob)
@@ -200,7 +238,15 @@ document.addEventListener("DOMContentLoaded", () => {
       }
 
       showAlert("success", "Item deleted successfully.")
-      loadHistory()
+      // Later pages are unaffected, only drop this item from the list
+      const button = document.querySelector(`.btn-delete[data-id="${itemId}"]`)
+      const historyItem = button && button.closest(".history-item")
+      if (historyItem) {
+        historyItem.remove()
+      }
+      if (!document.querySelector(".history-item")) {
+        loadHistory(nextCursor)
+      }
     } catch (error) {
       showAlert("error", "Failed to delete item.")
       console.error("Delete error:", error)
@@ -213,14 +259,34 @@ document.addEventListener("DOMContentLoaded", () => {
     downloadTranscription(itemId)
   }
 
+  // Handle show full text button click
+  function handleExpand(event) {
+    expandTranscription(event.currentTarget)
+  }
+
   // Handle delete button click
   function handleDelete(event) {
     const itemId = event.target.getAttribute("data-id")
     deleteHistoryItem(itemId)
   }
 
+  function updateLoadMore() {
+    const loadMore = document.getElementById("load-more")
+    if (loadMore) {
+      loadMore.classList.toggle("hidden", !nextCursor)
+    }
+  }
+
   // Load history on page load
   if (document.getElementById("history-list")) {
+    const loadMore = document.getElementById("load-more")
+    if (loadMore) {
+      loadMore.addEventListener("click", async () => {
+        loadMore.disabled = true
+        await loadHistory(nextCursor)
+        loadMore.disabled = false
+      })
+    }
     loadHistory()
   }
 })
@@ -0,0 +1,116 @@
+// Helpers for the background /transcribe jobs.
+// POST /transcribe answers right away with a job id, the result is fetched once the job is done,
+// either by polling or by following the job's server-sent events as each part is ready.
+
+const POLL_INTERVAL_MS = 1000
+
+function sleep(ms) {
+  return new Promise((resolve) => setTimeout(resolve, ms))
+}
+
+async function waitForTranscriptionJob(jobId, token, onProgress) {
+  const headers = { Authorization: `Bearer ${token}` }
+
+  while (true) {
+    const response = await fetch(`/api/jobs/${jobId}`, { headers })
+    if (!response.ok) {
+      throw new Error(`Failed to get transcription status (${response.status})`)
+    }
+
+    const job = await response.json()
+    if (onProgress) {
+      onProgress(job)
+    }
+
+    if (job.status === "failed") {
+      throw new Error(job.error || "Transcription failed")
+    }
+
+    if (job.status === "done") {
+      const resultResponse = await fetch(`/api/jobs/${jobId}/result`, { headers })
+      if (!resultResponse.ok) {
+        throw new Error(`Failed to get transcription result (${resultResponse.status})`)
+      }
+      return await resultResponse.json()
+    }
+
+    await sleep(POLL_INTERVAL_MS)
+  }
+}
+
+// Reads the job id from a /transcribe response and waits for the job result
+async function transcriptionResultFromResponse(response, token, onProgress) {
+  const job = await response.json()
+  console.log("Transcription job queued:", job.job_id)
+  return waitForTranscriptionJob(job.job_id, token, onProgress)
+}
+
+// Parses one "event: ...\ndata: ..." block of a text/event-stream
+function parseServerSentEvent(block) {
+  let type = "message"
+  const data = []
+  for (const line of block.split("\n")) {
+    if (line.startsWith("event:")) {
+      type = line.slice(6).trim()
+    } else if (line.startsWith("data:")) {
+      data.push(line.slice(5).trim())
+    }
+  }
+  return data.length ? { type, data: JSON.parse(data.join("\n")) } : null
+}
+
+// Follows /api/jobs/{id}/events and calls handlers.onStage(stage),
+// handlers.onTranscript(index, text) and handlers.onSigns(index, videoIds) as the
+// parts arrive. EventSource cannot send the Authorization header, so the stream is
+// read with fetch. Falls back to polling if the stream is not available.
+async function followTranscriptionJob(jobId, token, handlers = {}) {
+  const response = await fetch(`/api/jobs/${jobId}/events`, {
+    headers: { Authorization: `Bearer ${token}`, Accept: "text/event-stream" },
+  })
+  if (!response.ok || !response.body) {
+    console.log("Job event stream unavailable, polling instead")
+    return waitForTranscriptionJob(jobId, token, (job) => handlers.onStage && job.stage && handlers.onStage(job.stage))
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ""
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) {
+      break
+    }
+    buffer += value
+    let end
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const event = parseServerSentEvent(buffer.slice(0, end))
+      buffer = buffer.slice(end + 2)
+      if (!event) {
+        continue
+      }
+
+      const data = event.data
+      if (event.type === "stage" && handlers.onStage) {
+        handlers.onStage(data.stage)
+      } else if (event.type === "transcript" && handlers.onTranscript) {
+        handlers.onTranscript(data.index, data.text)
+      } else if (event.type === "signs" && handlers.onSigns) {
+        handlers.onSigns(data.index, data.video_ids)
+      } else if (event.type === "error") {
+        reader.cancel()
+        throw new Error(data.error || "Transcription failed")
+      } else if (event.type === "done") {
+        reader.cancel()
+        return data.result
+      }
+    }
+  }
+
+  // Stream closed early, the result is still available
+  return waitForTranscriptionJob(jobId, token)
+}
+
+window.transcriptionJobs = {
+  waitForTranscriptionJob,
+  transcriptionResultFromResponse,
+  followTranscriptionJob,
+}
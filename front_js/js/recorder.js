@@ -34,6 +34,15 @@ document.addEventListener("DOMContentLoaded", async () => {
   let timerInterval
   let isRecording = false
 
+  // Live mode: chunks also go to /ws/transcribe while recording and the sign
+  // videos are played as each part of the speech is transcribed
+  const liveSignsCheckbox = document.getElementById("live-signs")
+  const LIVE_MAX_BUFFERED_BYTES = 2 * 1024 * 1024
+  let liveSocket = null
+  let livePending = []
+  let liveParts = []
+  let liveSlowWarned = false
+
   // Function to show alerts (success or error)
   function showAlert(type, message) {
     try {
@@ -109,6 +118,78 @@ document.addEventListener("DOMContentLoaded", async () => {
     }
   }
 
+  function openLiveSocket(token) {
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws"
+    liveSocket = new WebSocket(`${protocol}://${window.location.host}/ws/transcribe?token=${encodeURIComponent(token)}`)
+    livePending = []
+    liveParts = []
+    liveSlowWarned = false
+
+    const transcriptionResult = document.getElementById("transcription-result")
+    const transcriptionContent = document.getElementById("transcription-content")
+    if (window.videoPlayer) {
+      window.videoPlayer.setVideos([])
+    }
+
+    liveSocket.addEventListener("open", () => {
+      livePending.forEach((data) => liveSocket.send(data))
+      livePending = []
+    })
+
+    liveSocket.addEventListener("message", (event) => {
+      const message = JSON.parse(event.data)
+      if (message.type === "transcript") {
+        liveParts[message.index] = message.text
+        if (transcriptionContent && transcriptionResult) {
+          transcriptionContent.textContent = liveParts.filter(Boolean).join(" ")
+          transcriptionResult.classList.remove("hidden")
+        }
+      } else if (message.type === "signs") {
+        if (window.videoPlayer && message.video_ids.length) {
+          window.videoPlayer.appendVideos(message.video_ids)
+        }
+      } else if (message.type === "busy") {
+        showAlert("warning", "Transcription is catching up, signs may lag behind.")
+      } else if (message.type === "error") {
+        showAlert("error", message.error || "Live transcription failed")
+      } else if (message.type === "done") {
+        console.log("Live transcription finished:", message.result)
+      }
+    })
+
+    liveSocket.addEventListener("close", (event) => {
+      if (event.code === 1008) {
+        showAlert("error", "You are not logged in. Please log in and try again.")
+      }
+      liveSocket = null
+    })
+  }
+
+  function sendLiveChunk(data) {
+    if (!liveSocket) {
+      return
+    }
+    if (liveSocket.readyState === WebSocket.CONNECTING) {
+      livePending.push(data)
+      return
+    }
+    if (liveSocket.readyState !== WebSocket.OPEN) {
+      return
+    }
+    // The server reads no faster than it transcribes, warn if we pile up locally
+    if (liveSocket.bufferedAmount > LIVE_MAX_BUFFERED_BYTES && !liveSlowWarned) {
+      liveSlowWarned = true
+      showAlert("warning", "Slow connection, live signs are delayed.")
+    }
+    liveSocket.send(data)
+  }
+
+  function stopLiveSocket() {
+    if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+      liveSocket.send(JSON.stringify({ type: "stop" }))
+    }
+  }
+
   // Function to convert Float32Array to Int16Array (required for MP3 encoding)
   function convertToInt16(float32Array) {
     const int16Array = new Int16Array(float32Array.length);
@@ -139,6 +220,13 @@ document.addEventListener("DOMContentLoaded", async () => {
         // Store the stream
         audioStream = stream
 
+        if (liveSignsCheckbox && liveSignsCheckbox.checked) {
+          const token = localStorage.getItem("token")
+          if (token) {
+            openLiveSocket(token)
+          }
+        }
+
         // Check if lamejs is available
         const lameJsAvailable = checkLameJs();
         
@@ -164,6 +252,7 @@ document.addEventListener("DOMContentLoaded", async () => {
           mediaRecorder.addEventListener("dataavailable", (event) => {
             if (event.data.size > 0) {
               audioChunks.push(event.data)
+              sendLiveChunk(event.data)
             }
           })
 
@@ -182,6 +271,7 @@ document.addEventListener("DOMContentLoaded", async () => {
 
             // Stop all tracks
             stream.getTracks().forEach((track) => track.stop())
+            stopLiveSocket()
           })
 
           mediaRecorder.start(1000)
@@ -213,6 +303,7 @@ document.addEventListener("DOMContentLoaded", async () => {
             const mp3buf = mp3Encoder.encodeBuffer(samples);
             if (mp3buf.length > 0) {
               mp3Data.push(mp3buf);
+              sendLiveChunk(mp3buf);
             }
           };
           
@@ -262,7 +353,9 @@ document.addEventListener("DOMContentLoaded", async () => {
         const mp3Final = mp3Encoder.flush();
         if (mp3Final.length > 0) {
           mp3Data.push(mp3Final);
+          sendLiveChunk(mp3Final);
         }
+        stopLiveSocket();
         
         // Create MP3 blob
         const blob = new Blob(mp3Data, { type: "audio/mp3" });
@@ -416,7 +509,9 @@ document.addEventListener("DOMContentLoaded", async () => {
           throw new Error(errorMessage)
         }
 
-        const transcription = await response.text()
+        // The upload only queues a job, wait for the pipeline to finish
+        const result = await window.transcriptionJobs.transcriptionResultFromResponse(response, token)
+        const transcription = result.transcription
         console.log("Transcription received, length:", transcription.length)
         console.log("Transcription preview:", transcription.substring(0, 100) + "...")
 
@@ -432,6 +527,11 @@ document.addEventListener("DOMContentLoaded", async () => {
           showAlert("error", "Could not display transcription. Please try refreshing the page.")
         }
 
+        // The job result already contains the sign video IDs
+        if (window.videoPlayer && result.video_ids) {
+          window.videoPlayer.setVideos(result.video_ids)
+        }
+
         // Reset recorder
         resetRecorderUI()
         audioChunks = []
@@ -187,11 +187,15 @@ document.addEventListener("DOMContentLoaded", () => {
         throw new Error(errorData.detail || "Failed to transcribe")
       }
 
-      // Get the response text
-      const responseText = await response.text()
+      // The upload only queues a job, wait for the pipeline to finish
+      const result = await window.transcriptionJobs.transcriptionResultFromResponse(response, token)
 
       // Handle the transcription response
-      handleTranscriptionResponse(responseText)
+      handleTranscriptionResponse({
+        id: result.media_id,
+        text: result.transcription,
+        video_ids: result.video_ids,
+      })
     } catch (error) {
       hideLoading()
       console.error(`Error submitting ${formType} for transcription:`, error)
@@ -286,12 +286,44 @@ document.addEventListener("DOMContentLoaded", () => {
         throw new Error(errorMessage)
       }
 
-      const transcription = await response.text()
+      // The upload only queues a job: follow it, showing each part of the
+      // transcript and playing its sign videos as soon as they are ready
+      const job = await response.json()
+      console.log("Transcription job queued:", job.job_id)
+      const parts = []
+      let streamedVideos = false
+      if (window.videoPlayer) {
+        window.videoPlayer.setVideos([])
+      }
+
+      const result = await window.transcriptionJobs.followTranscriptionJob(job.job_id, token, {
+        onStage: (stage) => {
+          if (transcriptionContent && !parts.length) {
+            transcriptionContent.innerHTML = `
+        <div style="text-align: center; padding: 20px;">
+          <div class="spinner" style="margin: 0 auto;"></div>
+          <p>Transcribing your ${fileType}... (${stage})</p>
+        </div>
+      `
+          }
+        },
+        onTranscript: (index, text) => {
+          parts[index] = text
+          if (transcriptionContent) {
+            transcriptionContent.textContent = parts.filter(Boolean).join(" ")
+          }
+        },
+        onSigns: (index, videoIds) => {
+          if (window.videoPlayer && videoIds.length) {
+            window.videoPlayer.appendVideos(videoIds)
+            streamedVideos = true
+          }
+        },
+      })
+      const transcription = result.transcription
       console.log("Transcription received, length:", transcription.length)
       console.log("Transcription preview:", transcription.substring(0, 100) + "...")
 
-      
-
       // Display transcription
       if (transcriptionResult && transcriptionContent) {
         transcriptionContent.textContent = transcription
@@ -304,6 +336,11 @@ document.addEventListener("DOMContentLoaded", () => {
         showAlert("error", "Could not display transcription. Please try refreshing the page.")
       }
 
+      // Cached results and polled jobs come without partial events
+      if (window.videoPlayer && result.video_ids && !streamedVideos) {
+        window.videoPlayer.setVideos(result.video_ids)
+      }
+
 
       // Reset form
       if (fileType !== "text") {
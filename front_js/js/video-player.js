@@ -106,6 +106,19 @@ class VideoPlayer {
         }
     }
   
+    // Adds videos to the end of the playlist, starting playback if nothing is playing
+    appendVideos(videoIds) {
+        console.log(`Appending videos: ${videoIds.join(', ')}`);
+        const wasIdle = this.currentIndex >= this.videoIds.length - 1 &&
+            (this.videoIds.length === 0 || this.videoElement.ended);
+        const next = this.videoIds.length;
+        this.videoIds = this.videoIds.concat(videoIds);
+
+        if (wasIdle && next < this.videoIds.length) {
+            this.loadVideo(next);
+        }
+    }
+  
     loadVideo(index) {
         console.log(`Loading video at index ${index}`);
         if (index < 0 || index >= this.videoIds.length) {